@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+守护进程内存基准测试
+
+在本地子进程中启动一个模拟的认证服务器和webhook，连续运行大量守护进程检查周期，
+比较预热后与结束时的RSS和tracemalloc跟踪内存，增长超过阈值时以非零状态码退出。
+
+用法:
+    python3 bench_memory.py --cycles 500 --low-memory
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import multiprocessing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import memstat
+from main import AutoLogin
+
+
+class FakePortalHandler(BaseHTTPRequestHandler):
+    """模拟认证服务器、外网探测地址和企业微信webhook"""
+
+    def do_GET(self):
+        if self.path.startswith("/eportal/"):
+            self._reply(200, b'dr1003({"result":"1","msg":"\\u767b\\u5f55\\u6210\\u529f"})')
+        elif self.path.startswith("/a79.htm"):
+            self._reply(200, b"<html></html>")
+        else:
+            # 外网探测返回错误，使每个周期都走完整的登录流程
+            self._reply(503, b"")
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._reply(200, b'{"errcode":0,"errmsg":"ok"}')
+
+    def _reply(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="守护进程内存基准测试")
+    parser.add_argument("--cycles", type=int, default=500, help="测量的检查周期数，默认500")
+    parser.add_argument("--warmup", type=int, default=50, help="预热周期数，默认50")
+    parser.add_argument("--rss-limit", type=int, default=1024, help="允许的RSS增长（KB），默认1024")
+    parser.add_argument("--alloc-limit", type=int, default=64, help="允许的跟踪内存增长（KB），默认64")
+    parser.add_argument("--low-memory", action="store_true", help="使用低内存模式运行")
+    return parser.parse_args()
+
+
+def main():
+    """程序入口点"""
+    args = parse_args()
+
+    # 模拟服务器运行在独立进程中，避免其内存分配计入测量结果
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakePortalHandler)
+    address = f"127.0.0.1:{server.server_address[1]}"
+    server_process = multiprocessing.get_context("fork").Process(target=server.serve_forever, daemon=True)
+    server_process.start()
+    server.server_close()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        config_file = os.path.join(work_dir, "config.json")
+        with open(config_file, "w", encoding="utf-8") as f:
+            json.dump({
+                "student_id": "S00000000",
+                "password": "benchmark",
+                "webhook_urls": [f"http://{address}/webhook"],
+                # 探测地址也指向模拟服务器，预解析不会产生真实的DNS查询
+                "health_probe_url": f"http://{address}/probe",
+                "log_level": "ERROR",
+                "state_dir": work_dir,
+                "link_gate": False,
+                "low_memory": args.low_memory
+            }, f)
+
+        auto_login = AutoLogin(config_file=config_file)
+        portal = auto_login.get_portal()
+        portal.login_url = portal.login_url.replace("172.16.253.3:801", address)
+        portal.campus_check_url = f"http://{address}/a79.htm"
+        portal.status_check_url = f"http://{address}/status"
+
+        status = {"cycles": 0}
+        for _ in range(args.warmup):
+            auto_login.run_daemon_cycle(status)
+
+        # 预热后才开启分配跟踪，延迟导入的模块已经加载完毕，tracemalloc自身的记录开销不会计入RSS增长
+        memstat.start_tracing()
+        memstat.trim_memory()
+        rss_before = memstat.get_rss_kb()
+        traced_before = memstat.take_snapshot(limit=0)["traced_kb"]
+
+        for _ in range(args.cycles):
+            auto_login.run_daemon_cycle(status)
+
+        memstat.trim_memory()
+        rss_after = memstat.get_rss_kb()
+        snapshot = memstat.take_snapshot()
+
+    server_process.terminate()
+    server_process.join()
+
+    rss_growth = rss_after - rss_before
+    traced_growth = snapshot["traced_kb"] - traced_before
+    print(f"周期数: {args.cycles} (预热 {args.warmup})，低内存模式: {'是' if args.low_memory else '否'}")
+    print(f"RSS: {rss_before}KB -> {rss_after}KB (增长 {rss_growth}KB，阈值 {args.rss_limit}KB)")
+    print(f"跟踪内存: {traced_before}KB -> {snapshot['traced_kb']}KB "
+          f"(增长 {traced_growth:.1f}KB，阈值 {args.alloc_limit}KB)")
+
+    if rss_growth > args.rss_limit or traced_growth > args.alloc_limit:
+        print("内存增长超过阈值，主要分配位置:")
+        for stat in snapshot["top"]:
+            print(f"  {stat['location']}: {stat['size_kb']}KB ({stat['count']}个对象)")
+        sys.exit(1)
+
+    print("内存占用稳定")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+启动性能基准测试
+
+比较不同打包方式（onefile、onedir、源码运行）执行 `--version` 和 `login` 的冷启动、热启动耗时和峰值RSS。
+login使用临时生成的回放轨迹，不访问真实网络，结果只反映启动和程序本身的开销。
+以root运行时每次冷启动前会清空页缓存，否则冷启动结果仅为本次测试的第一次运行。
+
+用法:
+    python3 bench_startup.py --runs 10
+    python3 bench_startup.py --target onedir=/usr/local/lib/autonet4ahu/autonet4ahu
+"""
+
+import argparse
+import json
+import os
+import shlex
+import statistics
+import sys
+import tempfile
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DIST_DIR = os.path.join(os.path.dirname(SCRIPT_DIR), "dist")
+
+# 默认参与比较的打包方式，不存在的构建产物会被跳过
+DEFAULT_TARGETS = {
+    "onefile": os.path.join(DIST_DIR, "autonet4ahu"),
+    "onedir": os.path.join(DIST_DIR, "onedir", "autonet4ahu", "autonet4ahu"),
+    "source": f"{shlex.quote(sys.executable)} {shlex.quote(os.path.join(SCRIPT_DIR, 'main.py'))}"
+}
+
+# 登录流程的回放轨迹：在校园网内、外网不可达、登录成功
+LOGIN_TRACE = [
+    {"method": "GET", "url": "http://172.16.253.3/a79.htm", "status_code": 200, "text": "<html></html>"},
+    {"method": "GET", "url": "http://www.baidu.com", "status_code": 503, "text": ""},
+    {"method": "GET", "url": "http://172.16.253.3:801/eportal/", "status_code": 200,
+     "text": 'dr1003({"result":"1","msg":"\\u767b\\u5f55\\u6210\\u529f"})'},
+    {"method": "GET", "url": "http://www.baidu.com", "status_code": 200, "text": ""}
+]
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="启动性能基准测试")
+    parser.add_argument("--target", action="append", metavar="NAME=COMMAND",
+                        help="参与比较的打包方式及其启动命令，可重复指定，默认检测dist目录中的构建产物和源码")
+    parser.add_argument("--runs", type=int, default=10, help="每项热启动测量次数，默认10")
+    parser.add_argument("--output", help="将测量结果以JSON格式保存到指定文件")
+    return parser.parse_args()
+
+
+def get_targets(specs):
+    """
+    解析参与比较的打包方式
+
+    Returns:
+        dict: 名称 -> 启动命令参数列表
+    """
+    if not specs:
+        targets = {}
+        for name, command in DEFAULT_TARGETS.items():
+            argv = shlex.split(command)
+            if os.path.isfile(argv[-1]):
+                targets[name] = argv
+        return targets
+
+    targets = {}
+    for spec in specs:
+        name, sep, command = spec.partition("=")
+        if not sep or not command:
+            raise SystemExit(f"无效的--target参数: {spec}，格式应为 NAME=COMMAND")
+        targets[name] = shlex.split(command)
+    return targets
+
+
+def drop_caches():
+    """
+    清空页缓存、目录项和inode缓存，使下一次运行从磁盘读取
+
+    Returns:
+        bool: 是否清空成功（需要root权限）
+    """
+    try:
+        os.sync()
+        with open("/proc/sys/vm/drop_caches", "w") as f:
+            f.write("3\n")
+        return True
+    except OSError:
+        return False
+
+
+def run_once(argv, cwd):
+    """
+    运行一次命令并测量耗时和峰值RSS
+
+    wait4返回的资源统计包含已被回收的子孙进程，onefile引导程序派生的Python进程也会计入峰值RSS。
+
+    Returns:
+        float: 耗时（毫秒）
+        int: 峰值RSS（KB）
+        int: 退出状态码
+    """
+    start_time = time.perf_counter()
+    pid = _spawn_in(argv, cwd)
+    _, status, rusage = os.wait4(pid, 0)
+    elapsed = (time.perf_counter() - start_time) * 1000
+    return elapsed, rusage.ru_maxrss, os.waitstatus_to_exitcode(status)
+
+
+def _spawn_in(argv, cwd):
+    """在指定工作目录中启动命令，输出重定向到/dev/null"""
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.chdir(cwd)
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, 1)
+            os.dup2(devnull, 2)
+            os.execvp(argv[0], argv)
+        finally:
+            os._exit(127)
+    return pid
+
+
+def measure(argv, cwd, runs, can_drop):
+    """
+    测量一条命令的冷启动和热启动性能
+
+    Returns:
+        dict: 冷启动耗时、热启动耗时中位数/最小值/最大值、峰值RSS和退出状态码
+    """
+    if can_drop:
+        drop_caches()
+    cold_ms, cold_rss, exit_code = run_once(argv, cwd)
+
+    warm = [run_once(argv, cwd) for _ in range(runs)]
+    warm_ms = [elapsed for elapsed, _, _ in warm]
+    return {
+        "cold_ms": round(cold_ms, 1),
+        "warm_median_ms": round(statistics.median(warm_ms), 1) if warm_ms else None,
+        "warm_min_ms": round(min(warm_ms), 1) if warm_ms else None,
+        "warm_max_ms": round(max(warm_ms), 1) if warm_ms else None,
+        "peak_rss_kb": max([cold_rss] + [rss for _, rss, _ in warm]),
+        "exit_code": max([exit_code] + [code for _, _, code in warm], key=abs)
+    }
+
+
+def main():
+    """程序入口点"""
+    args = parse_args()
+    targets = get_targets(args.target)
+    if not targets:
+        print("没有可用的构建产物，请先运行 build.sh [onefile|onedir] 或通过 --target 指定")
+        sys.exit(1)
+
+    can_drop = drop_caches()
+    if not can_drop:
+        print("警告: 无法清空页缓存（需要root权限），冷启动结果仅为第一次运行，可能已被缓存")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        config_file = os.path.join(work_dir, "config.json")
+        with open(config_file, "w", encoding="utf-8") as f:
+            json.dump({
+                "student_id": "S00000000",
+                "password": "benchmark",
+                "webhook_urls": [],
+                "log_level": "ERROR",
+                "state_dir": work_dir,
+                "link_gate": False,
+                "dns_cache": False
+            }, f)
+
+        trace_file = os.path.join(work_dir, "login.trace")
+        with open(trace_file, "w", encoding="utf-8") as f:
+            for entry in LOGIN_TRACE:
+                f.write(json.dumps(entry) + "\n")
+
+        commands = {
+            "--version": ["--version"],
+            "login": ["-c", config_file, "-r", "1", "--replay", trace_file, "--replay-speed", "0", "login"]
+        }
+
+        for name, argv in targets.items():
+            for command, command_args in commands.items():
+                results[f"{name} {command}"] = measure(argv + command_args, work_dir, args.runs, can_drop)
+
+    print(f"{'打包方式/命令':<24}{'冷启动(ms)':>12}{'热启动中位数(ms)':>18}{'最小/最大(ms)':>18}{'峰值RSS(KB)':>14}")
+    for key, result in results.items():
+        warm_range = f"{result['warm_min_ms']}/{result['warm_max_ms']}"
+        print(f"{key:<24}{result['cold_ms']:>12}{str(result['warm_median_ms']):>18}"
+              f"{warm_range:>18}{result['peak_rss_kb']:>14}")
+        if result["exit_code"] != 0:
+            print(f"  警告: 退出状态码为 {result['exit_code']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"runs": args.runs, "caches_dropped": can_drop, "results": results}, f, indent=2)
+        print(f"测量结果已保存到 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,7 +13,30 @@ SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 OUTPUT_DIR="${SCRIPT_DIR}/../dist"
 OUTPUT_NAME="autonet4ahu"
 
-echo -e "${BLUE}开始编译 AutoNet4AHU...${NC}"
+# 打包模式:
+#   onefile - 单文件，每次启动都需要先解压到临时目录（默认）
+#   onedir  - 目录形式，安装到/usr/local/lib后启动时无需解压，适合NetworkManager钩子和定时器频繁调用
+BUILD_MODE="${1:-onefile}"
+
+case "$BUILD_MODE" in
+    onefile)
+        PYINSTALLER_MODE="--onefile"
+        DIST_PATH="${OUTPUT_DIR}"
+        OUTPUT_PATH="${OUTPUT_DIR}/${OUTPUT_NAME}"
+        ;;
+    onedir)
+        PYINSTALLER_MODE="--onedir"
+        DIST_PATH="${OUTPUT_DIR}/onedir"
+        OUTPUT_PATH="${DIST_PATH}/${OUTPUT_NAME}/${OUTPUT_NAME}"
+        ;;
+    *)
+        echo -e "${RED}错误: 未知的打包模式 $BUILD_MODE${NC}"
+        echo "用法: $0 [onefile|onedir]"
+        exit 1
+        ;;
+esac
+
+echo -e "${BLUE}开始编译 AutoNet4AHU (${BUILD_MODE})...${NC}"
 
 # 检查必要的工具
 if ! command -v pip3 &> /dev/null; then
@@ -26,26 +49,31 @@ echo -e "${BLUE}安装编译依赖...${NC}"
 pip3 install -r "${SCRIPT_DIR}/requirements.txt" pyinstaller
 
 # 创建输出目录
-mkdir -p "${OUTPUT_DIR}"
+mkdir -p "${DIST_PATH}"
 
 # 使用PyInstaller打包
 echo -e "${BLUE}使用PyInstaller打包...${NC}"
 pyinstaller --clean \
-    --onefile \
+    --noconfirm \
+    ${PYINSTALLER_MODE} \
     --name "${OUTPUT_NAME}" \
-    --distpath "${OUTPUT_DIR}" \
+    --distpath "${DIST_PATH}" \
     --add-data "${SCRIPT_DIR}/requirements.txt:." \
     --hidden-import systemd.journal \
     "${SCRIPT_DIR}/main.py"
 
 # 添加执行权限
-chmod +x "${OUTPUT_DIR}/${OUTPUT_NAME}"
+chmod +x "${OUTPUT_PATH}"
 
-echo -e "${GREEN}编译成功: ${OUTPUT_DIR}/${OUTPUT_NAME}${NC}"
-echo -e "${BLUE}文件大小: $(du -h "${OUTPUT_DIR}/${OUTPUT_NAME}" | cut -f1)${NC}"
+echo -e "${GREEN}编译成功: ${OUTPUT_PATH}${NC}"
+if [ "$BUILD_MODE" = "onedir" ]; then
+    echo -e "${BLUE}目录大小: $(du -sh "$(dirname "${OUTPUT_PATH}")" | cut -f1)${NC}"
+else
+    echo -e "${BLUE}文件大小: $(du -h "${OUTPUT_PATH}" | cut -f1)${NC}"
+fi
 
 # 清理编译临时文件
 echo -e "${BLUE}清理临时文件...${NC}"
 rm -rf "${SCRIPT_DIR}/__pycache__" "${SCRIPT_DIR}/build" "${SCRIPT_DIR}/${OUTPUT_NAME}.spec"
 
-echo -e "${GREEN}编译完成!${NC}" 
\ No newline at end of file
+echo -e "${GREEN}编译完成!${NC}"
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+双栈连接模块
+
+按照 RFC 8305 (Happy Eyeballs v2) 的思路，对主机名解析出的 IPv6/IPv4 地址交替、错峰发起TCP连接，
+使用最先建立的连接，并按地址族统计连接延迟。create_session() 返回的 requests 会话使用该连接方式，
+可作为 ePortal 的 transport 和 Notifier 的 session 使用。
+"""
+
+import errno
+import os
+import socket
+import selectors
+import time
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+# RFC 8305 建议的连接尝试间隔（秒）
+DEFAULT_ATTEMPT_DELAY = 0.25
+
+FAMILY_NAMES = {
+    socket.AF_INET: "IPv4",
+    socket.AF_INET6: "IPv6"
+}
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyStats:
+    """按地址族统计连接延迟和竞速结果"""
+
+    __slots__ = ("max_samples", "samples", "failures")
+
+    def __init__(self, max_samples=50):
+        """
+        初始化统计实例
+
+        Args:
+            max_samples: 每个地址族保留的最近延迟样本数
+        """
+        self.max_samples = max_samples
+        self.samples = {}
+        self.failures = {}
+
+    def record(self, family, latency):
+        """
+        记录一次连接结果
+
+        Args:
+            family: 地址族名称（IPv4/IPv6）
+            latency: 连接耗时（秒），连接失败时为None
+        """
+        if latency is None:
+            self.failures[family] = self.failures.get(family, 0) + 1
+            return
+
+        samples = self.samples.setdefault(family, [])
+        samples.append(latency)
+        if len(samples) > self.max_samples:
+            del samples[0]
+
+    def summary(self):
+        """
+        生成各地址族的延迟统计摘要
+
+        Returns:
+            str: 统计摘要，没有任何记录时返回空字符串
+        """
+        parts = []
+        for family in ("IPv6", "IPv4"):
+            samples = self.samples.get(family, [])
+            failures = self.failures.get(family, 0)
+            if not samples and not failures:
+                continue
+            part = f"{family} 胜出{len(samples)}次"
+            if samples:
+                part += f"，平均{sum(samples) / len(samples) * 1000:.1f}ms"
+            if failures:
+                part += f"，失败{failures}次"
+            parts.append(part)
+        return "; ".join(parts)
+
+
+# 进程内共享的延迟统计
+latency_stats = LatencyStats()
+
+# 进程内共享的域名解析缓存（resolver.ResolverCache），为None时直接使用系统解析器
+resolver_cache = None
+
+
+def _interleave(infos):
+    """
+    按RFC 8305交替排列不同地址族的地址，首个地址族沿用系统解析结果的首选项
+
+    Args:
+        infos: socket.getaddrinfo的返回结果
+
+    Returns:
+        list: 交替排列后的地址列表
+    """
+    if not infos:
+        return []
+
+    first_family = infos[0][0]
+    preferred = [info for info in infos if info[0] == first_family]
+    others = [info for info in infos if info[0] != first_family]
+
+    result = []
+    for i in range(max(len(preferred), len(others))):
+        if i < len(preferred):
+            result.append(preferred[i])
+        if i < len(others):
+            result.append(others[i])
+    return result
+
+
+def race_connect(address, timeout=None, source_address=None, socket_options=None,
+                 attempt_delay=DEFAULT_ATTEMPT_DELAY, stats=None):
+    """
+    对目标地址的所有解析结果错峰发起TCP连接，返回最先建立的连接
+
+    Args:
+        address: (主机, 端口)元组
+        timeout: 整体连接超时（秒），None表示不限制
+        source_address: 本地绑定地址，仅对地址族匹配的连接生效
+        socket_options: 连接前需要设置的socket选项列表
+        attempt_delay: 相邻两次连接尝试之间的间隔（秒）
+        stats: 延迟统计实例，默认使用模块级的latency_stats
+
+    Returns:
+        socket.socket: 已建立的连接
+        str: 连接使用的地址族名称
+        float: 连接耗时（秒）
+
+    Raises:
+        socket.timeout: 超时前没有任何连接建立成功
+        OSError: 所有地址均连接失败
+    """
+    stats = stats if stats is not None else latency_stats
+    host, port = address
+    if host.startswith("["):
+        host = host.strip("[]")
+
+    if resolver_cache is not None:
+        infos = resolver_cache.getaddrinfo(host, port)
+    else:
+        infos = socket.getaddrinfo(host, port, socket.AF_UNSPEC, socket.SOCK_STREAM)
+    candidates = _interleave(infos)
+    if not candidates:
+        raise OSError(f"无法解析地址: {host}")
+
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    selector = selectors.DefaultSelector()
+    errors = []
+    next_index = 0
+    next_attempt = time.monotonic()
+
+    try:
+        while True:
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                raise socket.timeout(f"连接 {host}:{port} 超时")
+
+            # 到达尝试时间或当前没有进行中的连接时，发起下一个地址的连接
+            if next_index < len(candidates) and (now >= next_attempt or not selector.get_map()):
+                family, sock_type, proto, _, sockaddr = candidates[next_index]
+                next_index += 1
+                family_name = FAMILY_NAMES.get(family, str(family))
+                sock = socket.socket(family, sock_type, proto)
+                try:
+                    for opt in socket_options or []:
+                        sock.setsockopt(*opt)
+                    if source_address and family == socket.AF_INET and ":" not in source_address[0]:
+                        sock.bind(source_address)
+                    sock.setblocking(False)
+                    err = sock.connect_ex(sockaddr)
+                    if err not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+                        raise OSError(err, os.strerror(err))
+                except OSError as e:
+                    sock.close()
+                    errors.append(e)
+                    stats.record(family_name, None)
+                    logger.debug(f"{family_name}连接 {sockaddr[0]} 失败: {e}")
+                    continue
+                selector.register(sock, selectors.EVENT_WRITE, (family_name, sockaddr, now))
+                next_attempt = now + attempt_delay
+
+            if not selector.get_map():
+                if next_index < len(candidates):
+                    continue
+                raise errors[-1] if errors else OSError(f"无法连接到 {host}:{port}")
+
+            # 等待到下一次尝试时间或超时时间
+            waits = []
+            if next_index < len(candidates):
+                waits.append(next_attempt - now)
+            if deadline is not None:
+                waits.append(deadline - now)
+            wait = max(0, min(waits)) if waits else None
+
+            for key, _ in selector.select(wait):
+                sock = key.fileobj
+                family_name, sockaddr, start_time = key.data
+                selector.unregister(sock)
+                err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if err:
+                    sock.close()
+                    errors.append(OSError(err, os.strerror(err)))
+                    stats.record(family_name, None)
+                    logger.debug(f"{family_name}连接 {sockaddr[0]} 失败: {os.strerror(err)}")
+                    # 连接失败时立即尝试下一个地址
+                    next_attempt = time.monotonic()
+                    continue
+
+                latency = time.monotonic() - start_time
+                stats.record(family_name, latency)
+                logger.debug(f"{family_name}连接 {sockaddr[0]} 胜出，耗时{latency * 1000:.1f}ms")
+                sock.setblocking(True)
+                sock.settimeout(timeout)
+                return sock, family_name, latency
+    finally:
+        # 关闭竞速失败的其余连接
+        for key in list(selector.get_map().values()):
+            key.fileobj.close()
+        selector.close()
+
+
+class _DualStackConnectionMixin:
+    """使用race_connect建立连接的urllib3连接类"""
+
+    def _new_conn(self):
+        timeout = self.timeout if isinstance(self.timeout, (int, float)) else None
+        try:
+            sock, _, _ = race_connect(
+                (self._dns_host, self.port),
+                timeout,
+                source_address=self.source_address,
+                socket_options=self.socket_options
+            )
+        except socket.timeout as e:
+            raise ConnectTimeoutError(
+                self, f"Connection to {self.host} timed out. (connect timeout={self.timeout})"
+            ) from e
+        except OSError as e:
+            raise NewConnectionError(self, f"Failed to establish a new connection: {e}") from e
+        return sock
+
+
+class DualStackHTTPConnection(_DualStackConnectionMixin, HTTPConnection):
+    pass
+
+
+class DualStackHTTPSConnection(_DualStackConnectionMixin, HTTPSConnection):
+    pass
+
+
+class DualStackHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = DualStackHTTPConnection
+
+
+class DualStackHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = DualStackHTTPSConnection
+
+
+class DualStackAdapter(HTTPAdapter):
+    """使用双栈竞速连接的requests传输适配器"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": DualStackHTTPConnectionPool,
+            "https": DualStackHTTPSConnectionPool
+        }
+
+
+def create_session():
+    """
+    创建使用双栈竞速连接的requests会话
+
+    Returns:
+        requests.Session: 会话实例
+    """
+    session = requests.Session()
+    adapter = DualStackAdapter()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+会话健康监测模块
+
+守护进程模式下在后台线程中以较低频率发送HEAD探测请求，按滑动窗口统计延迟和丢包，
+在发现请求被认证系统拦截或连续探测失败时立即通知守护进程重新认证，
+无需等待下一个检查周期。
+"""
+
+import threading
+import time
+import logging
+from collections import deque
+from urllib.parse import urlsplit
+
+import requests
+
+
+class HealthMonitor:
+    """会话健康监测器，在后台线程中运行"""
+
+    __slots__ = (
+        "trigger", "probe_url", "interval", "fail_threshold", "session", "link_check", "logger",
+        "window", "armed", "probes", "triggers", "last_reason", "last_intercepted", "_stop", "_thread"
+    )
+
+    def __init__(self, trigger, probe_url="http://www.baidu.com", interval=10, window=12,
+                 fail_threshold=2, session=None, link_check=None, logger=None):
+        """
+        初始化健康监测器实例
+
+        Args:
+            trigger: threading.Event，检测到会话失效时置位以唤醒守护进程
+            probe_url: 探测地址，应为未认证时会被认证系统拦截的HTTP地址
+            interval: 正常情况下的探测间隔（秒），决定探测流量和检测延迟
+            window: 用于统计延迟和丢包率的滑动窗口大小（探测次数）
+            fail_threshold: 连续失败多少次后触发重新认证
+            session: 发送HTTP请求的对象（需提供head方法），默认使用requests模块
+            link_check: 返回链路是否可用的函数，链路不可用时暂停探测
+            logger: 日志记录器，如果不提供则使用默认的
+        """
+        self.trigger = trigger
+        self.probe_url = probe_url
+        self.interval = interval
+        self.fail_threshold = fail_threshold
+        self.session = session if session else requests
+        self.link_check = link_check
+
+        # 配置日志记录器
+        self.logger = logger if logger else logging.getLogger(__name__)
+
+        # 滑动窗口中每项为(是否成功, 延迟秒数)
+        self.window = deque(maxlen=window)
+        # 只有在观察到会话正常后才会触发，避免未登录时反复触发重新认证
+        self.armed = False
+        self.probes = 0
+        self.triggers = 0
+        self.last_reason = ""
+        # 最近一次触发是否由认证系统拦截引起，仅丢包触发时会话可能仍然有效
+        self.last_intercepted = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """启动后台监测线程"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="HealthMonitor", daemon=True)
+        self._thread.start()
+        self.logger.info(f"会话健康监测已启动，探测地址: {self.probe_url}，探测间隔: {self.interval}秒")
+
+    def stop(self):
+        """停止后台监测线程"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 5)
+
+    def probe(self):
+        """
+        发送一次探测请求
+
+        Returns:
+            bool: 会话是否正常
+            float: 探测延迟（秒），请求失败时为None
+            str: 异常说明，正常时为空字符串
+            bool: 请求是否被重定向到其他主机（认证系统拦截）
+        """
+        start_time = time.monotonic()
+        try:
+            response = self.session.head(
+                self.probe_url,
+                timeout=max(1, min(self.interval, 5)),
+                allow_redirects=False
+            )
+        except Exception as e:
+            return False, None, f"探测请求失败: {type(e).__name__}", False
+
+        latency = time.monotonic() - start_time
+        if response.status_code in (200, 204):
+            return True, latency, "", False
+
+        # 未认证时认证系统通常会将请求重定向到认证页面
+        location = response.headers.get("Location", "")
+        probe_host = urlsplit(self.probe_url).hostname
+        if location and urlsplit(location).hostname not in (None, probe_host):
+            return False, latency, f"探测请求被重定向到 {location}", True
+        return False, latency, f"探测请求返回异常状态码 {response.status_code}", False
+
+    def record(self, ok, latency, reason, intercepted=False):
+        """
+        记录一次探测结果，并判断是否需要触发重新认证
+
+        Args:
+            ok: 会话是否正常
+            latency: 探测延迟（秒）
+            reason: 异常说明
+            intercepted: 请求是否被认证系统拦截
+
+        Returns:
+            bool: 本次是否触发了重新认证
+        """
+        self.probes += 1
+        self.window.append((ok, latency))
+
+        if ok:
+            self.armed = True
+            return False
+
+        self.logger.debug(f"会话健康探测异常: {reason}")
+        if not self.armed:
+            return False
+
+        # 出现拦截时立即触发，其他失败（超时、5xx、同主机重定向）需要连续失败达到阈值
+        failures = 0
+        for sample_ok, _ in reversed(self.window):
+            if sample_ok:
+                break
+            failures += 1
+
+        if intercepted or failures >= self.fail_threshold:
+            self.logger.warning(f"检测到会话可能已失效（{reason}），触发重新认证")
+            self.armed = False
+            self.triggers += 1
+            self.last_reason = reason
+            self.last_intercepted = intercepted
+            self.trigger.set()
+            return True
+        return False
+
+    def summary(self):
+        """
+        生成滑动窗口内的健康统计
+
+        Returns:
+            dict: 探测次数、丢包率、平均延迟和触发次数
+        """
+        latencies = [latency for ok, latency in self.window if ok]
+        failures = sum(1 for ok, _ in self.window if not ok)
+        return {
+            "probes": self.probes,
+            "loss_rate": round(failures / len(self.window), 3) if self.window else 0,
+            "avg_latency_ms": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else None,
+            "triggers": self.triggers,
+            "last_reason": self.last_reason
+        }
+
+    def _run(self):
+        """后台线程主循环，探测失败后缩短下一次探测的间隔以尽快确认"""
+        while not self._stop.is_set():
+            wait = self.interval
+            try:
+                if self.link_check is None or self.link_check():
+                    ok, latency, reason, intercepted = self.probe()
+                    self.record(ok, latency, reason, intercepted)
+                    if not ok and self.armed:
+                        wait = min(self.interval, 1)
+            except Exception as e:
+                self.logger.warning(f"会话健康探测过程中发生异常: {e}")
+            self._stop.wait(wait)
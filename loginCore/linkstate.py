@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+链路状态检测模块
+
+只读取内核在 /sys/class/net 和 /proc/net 下暴露的接口载波/运行状态、路由和地址信息，
+不产生任何网络流量，用于在没有可用链路时跳过登录流程中的全部网络操作。
+"""
+
+import os
+import socket
+import sys
+import time
+
+SYS_NET_DIR = "/sys/class/net"
+
+# 认证服务器地址，存在覆盖该地址的路由时即使没有默认路由也认为链路可用
+PORTAL_ADDRESS = "172.16.253.3"
+
+# 视为链路可用的operstate取值，部分驱动（如某些虚拟网卡、PPP）只报告unknown
+USABLE_OPERSTATES = ("up", "unknown")
+
+# IPv6路由表中的RTF_REJECT标志，对应不可达路由
+RTF_REJECT = 0x0200
+
+# /proc/net/if_inet6中的地址标志（IFA_F_*）
+IFA_F_TEMPORARY = 0x01
+IFA_F_DADFAILED = 0x08
+IFA_F_DEPRECATED = 0x20
+IFA_F_TENTATIVE = 0x40
+UNUSABLE_IPV6_FLAGS = IFA_F_DADFAILED | IFA_F_DEPRECATED | IFA_F_TENTATIVE
+
+
+def _read(path):
+    """读取sysfs/procfs文件内容，失败时返回None"""
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def get_up_interfaces():
+    """
+    获取有载波且处于运行状态的网络接口（不包括回环接口）
+
+    Returns:
+        list: 接口名列表
+    """
+    interfaces = []
+    for name in sorted(os.listdir(SYS_NET_DIR)):
+        if name == "lo":
+            continue
+        if _read(os.path.join(SYS_NET_DIR, name, "operstate")) not in USABLE_OPERSTATES:
+            continue
+        # 接口未启用时读取carrier会失败
+        if _read(os.path.join(SYS_NET_DIR, name, "carrier")) != "1":
+            continue
+        interfaces.append(name)
+    return interfaces
+
+
+def _ipv4_routes(target=PORTAL_ADDRESS):
+    """
+    读取IPv4路由表
+
+    Args:
+        target: 需要检查是否有路由覆盖的IPv4地址
+
+    Returns:
+        set: 存在覆盖target的非默认路由的接口名
+        set: 存在IPv4默认路由的接口名
+    """
+    # /proc/net/route中的地址和掩码为主机字节序的十六进制
+    target = int.from_bytes(socket.inet_aton(target), sys.byteorder)
+    routed, default = set(), set()
+    content = _read("/proc/net/route") or ""
+    for line in content.splitlines()[1:]:
+        fields = line.split()
+        if len(fields) < 8:
+            continue
+        destination, mask = int(fields[1], 16), int(fields[7], 16)
+        if mask == 0:
+            default.add(fields[0])
+        elif target & mask == destination:
+            routed.add(fields[0])
+    return routed, default
+
+
+def _ipv6_state():
+    """
+    读取IPv6全局地址和默认路由
+
+    Returns:
+        set: 拥有全局作用域IPv6地址的接口名
+        set: 存在IPv6默认路由的接口名
+    """
+    addressed, default = set(), set()
+    for line in (_read("/proc/net/if_inet6") or "").splitlines():
+        fields = line.split()
+        # 第4列为作用域，00表示全局地址
+        if len(fields) >= 6 and fields[3] == "00":
+            addressed.add(fields[5])
+
+    for line in (_read("/proc/net/ipv6_route") or "").splitlines():
+        fields = line.split()
+        if len(fields) < 10:
+            continue
+        if fields[0] == "0" * 32 and fields[1] == "00" and not int(fields[8], 16) & RTF_REJECT:
+            default.add(fields[9])
+    return addressed, default
+
+
+def get_default_ipv6_address():
+    """
+    获取拥有IPv6默认路由的接口上的全局IPv6地址
+
+    跳过已弃用、尚未完成重复地址检测或检测失败的地址，优先返回非临时（隐私扩展）地址，
+    避免选中docker、VPN等其他接口上的地址。
+
+    Returns:
+        str: IPv6地址，没有可用地址时返回空字符串
+    """
+    _, default = _ipv6_state()
+    candidates = []
+    for line in (_read("/proc/net/if_inet6") or "").splitlines():
+        fields = line.split()
+        # 第4列为作用域（00表示全局地址），第5列为地址标志
+        if len(fields) < 6 or fields[3] != "00" or fields[5] not in default:
+            continue
+        flags = int(fields[4], 16)
+        if flags & UNUSABLE_IPV6_FLAGS:
+            continue
+        address = socket.inet_ntop(socket.AF_INET6, bytes.fromhex(fields[0]))
+        candidates.append((bool(flags & IFA_F_TEMPORARY), address))
+
+    if not candidates:
+        return ""
+    candidates.sort(key=lambda candidate: candidate[0])
+    return candidates[0][1]
+
+
+def check_link(portal_address=PORTAL_ADDRESS):
+    """
+    检查是否存在可用于访问认证服务器的链路
+
+    当存在一个有载波、处于运行状态，并且拥有默认路由（IPv6需同时拥有全局地址）或覆盖认证服务器地址的路由的接口时，
+    认为链路可用。docker网桥、虚拟机网桥和VPN等只有其他网段路由的接口不会被视为可用链路。
+    无法读取内核接口信息（如非Linux系统）时默认认为可用，不进行拦截。
+
+    Args:
+        portal_address: 认证服务器的IPv4地址
+
+    Returns:
+        bool: 链路是否可用
+        str: 判断依据说明
+    """
+    if not os.path.isdir(SYS_NET_DIR):
+        return True, "无法读取网络接口状态，跳过链路检查"
+
+    interfaces = get_up_interfaces()
+    if not interfaces:
+        return False, "没有已连接的网络接口（网线未插入或无线未关联）"
+
+    v4_routed, v4_default = _ipv4_routes(portal_address)
+    v6_addressed, v6_default = _ipv6_state()
+
+    defaults = [name for name in interfaces if name in v4_default or (name in v6_default and name in v6_addressed)]
+    if defaults:
+        return True, f"接口 {', '.join(defaults)} 可用，存在默认路由"
+
+    routed = [name for name in interfaces if name in v4_routed]
+    if routed:
+        return True, f"接口 {', '.join(routed)} 可用，存在到认证服务器的路由"
+    return False, f"接口 {', '.join(interfaces)} 已连接但没有默认路由或到认证服务器的路由"
+
+
+def wait_for_link(timeout, poll_interval=1.0):
+    """
+    等待链路变为可用，链路可用时立即返回
+
+    Args:
+        timeout: 最长等待时间（秒）
+        poll_interval: 检查间隔（秒）
+
+    Returns:
+        bool: 等待结束时链路是否可用
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        usable, _ = check_link()
+        remaining = deadline - time.monotonic()
+        if usable or remaining <= 0:
+            return usable
+        time.sleep(min(poll_interval, remaining))
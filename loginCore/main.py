@@ -13,30 +13,43 @@ import platform
 import traceback
 from pathlib import Path
 import signal
+import threading
 
-try:
-    import systemd.journal
-    has_systemd = True
-except ImportError:
-    has_systemd = False
-
-from portal import ePortal
-from notify import Notifier
+# portal、notify（requests）、dualstack（urllib3）、health、resolver和throttle只在实际使用时导入，
+# --version、status以及链路不可用时跳过的运行不会加载它们
+import linkstate
+import memstat
+import statefile
 from version import VERSION, get_version_info
 
+# 登录结束前等待后台预解析完成的最长时间（秒）
+PREFETCH_JOIN_TIMEOUT = 3
+
 class AutoLogin:
     """校园网自动登录入口模块"""
     
-    def __init__(self, config_file="config.json"):
+    def __init__(self, config_file="config.json", transport=None):
         """
         初始化自动登录实例
         
         Args:
             config_file: 配置文件路径
+            transport: 认证请求使用的HTTP传输，默认使用requests模块，
+                       回放测试时可传入ReplayTransport
         """
         self.config_file = config_file
         self.config = self.load_config()
         self.setup_logger()
+        self.transport = transport
+        
+        # 跨检查周期复用的对象，避免守护进程每个周期重复创建
+        self.session = None
+        self.portal = None
+        self.notifier = None
+        self.resolver = None
+        self.link_usable = True
+        self.health_monitor = None
+        self.wake_event = threading.Event()
         
         # 注册信号处理程序
         signal.signal(signal.SIGTERM, self.handle_signal)
@@ -77,14 +90,18 @@ class AutoLogin:
         self.logger.addHandler(console_handler)
         
         # 如果支持systemd，添加systemd journal处理器
-        if has_systemd:
+        # 低内存模式下不加载systemd模块，由systemd服务的StandardOutput收集控制台日志
+        if not self.config.get("low_memory", False):
             try:
+                import systemd.journal
                 journal_handler = systemd.journal.JournalHandler(
                     SYSLOG_IDENTIFIER="autonet4ahu"
                 )
                 journal_handler.setLevel(log_level)
                 self.logger.addHandler(journal_handler)
                 self.logger.debug("已添加systemd journal日志处理器")
+            except ImportError:
+                pass
             except Exception as e:
                 self.logger.warning(f"添加systemd journal处理器失败: {e}")
         
@@ -123,7 +140,21 @@ class AutoLogin:
             "student_id": "",
             "password": "",
             "webhook_urls": [],
-            "log_level": "INFO"
+            "log_level": "INFO",
+            "notify_throttle": True,
+            "notify_dedup_window": 900,
+            "notify_summary_interval": 3600,
+            "optimistic_login": True,
+            "dual_stack": True,
+            "dns_cache": True,
+            "dns_cache_ttl": 300,
+            "dns_negative_ttl": 30,
+            "link_gate": True,
+            "health_probe_interval": 10,
+            "health_probe_url": "http://www.baidu.com",
+            "health_fail_threshold": 2,
+            "low_memory": False,
+            "memory_trace_interval": 0
         }
         
         # 如果直接指定的配置文件存在，则使用它
@@ -167,13 +198,200 @@ class AutoLogin:
         """
         return bool(self.config.get("student_id")) and bool(self.config.get("password"))
     
-    def login(self, retry_count=1, retry_interval=30):
+    def get_state_dirs(self):
+        """
+        获取候选的状态目录，依次为配置的state_dir、系统目录、用户目录和配置文件所在目录
+        
+        Returns:
+            list: 状态目录列表
+        """
+        state_dirs = [
+            self.config.get("state_dir"),
+            "/var/lib/autonet4ahu",
+            os.path.expanduser("~/.local/share/autonet4ahu"),
+            os.path.dirname(os.path.abspath(self.config_file))
+        ]
+        return [state_dir for state_dir in state_dirs if state_dir]
+    
+    def get_state_file(self, name):
+        """
+        获取用于写入的运行状态文件路径，使用第一个可写的候选状态目录（不存在时创建）
+        
+        Args:
+            name: 状态文件名
+            
+        Returns:
+            str: 状态文件路径，所有目录均不可写时返回None
+        """
+        for state_dir in self.get_state_dirs():
+            try:
+                os.makedirs(state_dir, exist_ok=True)
+                if os.access(state_dir, os.W_OK):
+                    return os.path.join(state_dir, name)
+            except (PermissionError, OSError):
+                continue
+        
+        self.logger.warning(f"无法创建状态文件 {name}，相关状态将不会被保存")
+        return None
+    
+    def find_state_file(self, name):
+        """
+        在候选状态目录中查找已存在的状态文件，用于读取其他进程（如以root运行的守护进程）写入的状态
+        
+        Args:
+            name: 状态文件名
+            
+        Returns:
+            str: 最近更新的状态文件路径，不存在时返回None
+        """
+        found = []
+        for state_dir in self.get_state_dirs():
+            path = os.path.join(state_dir, name)
+            try:
+                found.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+        return max(found)[1] if found else None
+    
+    def is_replaying(self):
+        """
+        判断当前是否在回放录制的认证交互，录制模式仍然是真实的网络运行
+        
+        Returns:
+            bool: 认证请求是否使用ReplayTransport
+        """
+        # replay模块只在使用--record/--replay时才会被导入
+        replay = sys.modules.get("replay")
+        return replay is not None and isinstance(self.transport, replay.ReplayTransport)
+    
+    def link_is_usable(self):
+        """
+        通过内核链路状态检查当前是否有可用的网络链路，不产生网络流量
+        
+        Returns:
+            bool: 链路是否可用，未启用链路检查或回放时始终为True
+        """
+        if self.is_replaying() or not self.config.get("link_gate", True):
+            self.link_usable = True
+            return True
+        
+        usable, reason = linkstate.check_link()
+        if usable:
+            self.logger.debug(f"链路检查通过: {reason}")
+        else:
+            self.logger.info(f"没有可用的网络链路，跳过登录: {reason}")
+        self.link_usable = usable
+        return usable
+    
+    def get_resolver(self):
+        """
+        获取域名解析缓存，首次调用时创建并设置为双栈连接使用的解析器
+        
+        Returns:
+            ResolverCache: 解析缓存实例，未启用双栈或解析缓存时返回None
+        """
+        if self.resolver is None and self.config.get("dual_stack", True) and self.config.get("dns_cache", True):
+            import dualstack
+            from resolver import ResolverCache
+            self.resolver = ResolverCache(
+                self.get_state_file("dns_cache.json"),
+                ttl=self.config.get("dns_cache_ttl", 300),
+                negative_ttl=self.config.get("dns_negative_ttl", 30),
+                logger=self.logger
+            )
+            dualstack.resolver_cache = self.resolver
+        return self.resolver
+    
+    def get_latency_summary(self):
+        """
+        获取双栈连接的延迟统计
+        
+        Returns:
+            dict: 延迟统计，未使用双栈连接时返回None
+        """
+        # dualstack模块只在创建双栈会话时才会被导入
+        dualstack = sys.modules.get("dualstack")
+        return dualstack.latency_stats.summary() if dualstack else None
+    
+    def get_session(self):
+        """
+        获取认证请求和通知共用的双栈会话
+        
+        Returns:
+            requests.Session: 会话实例，未启用双栈时返回None（即使用requests模块）
+        """
+        if not self.config.get("dual_stack", True):
+            return None
+        if self.session is None:
+            import dualstack
+            self.get_resolver()
+            self.session = dualstack.create_session()
+        return self.session
+    
+    def get_transport(self):
+        """
+        获取发送HTTP请求使用的传输对象
+        
+        Returns:
+            认证请求使用的传输对象，未启用双栈且未指定传输时返回None（即使用requests模块）
+        """
+        if self.transport:
+            return self.transport
+        return self.get_session()
+    
+    def get_portal(self):
+        """
+        获取ePortal实例，已存在时复用并刷新本机地址
+        
+        Returns:
+            ePortal: 登录实例
+        """
+        if self.portal is None:
+            from portal import ePortal
+            self.portal = ePortal(
+                self.config.get("student_id"),
+                self.config.get("password"),
+                logger=self.logger,
+                transport=self.get_transport()
+            )
+        else:
+            self.portal.refresh_addresses()
+        return self.portal
+    
+    def get_notifier(self):
+        """
+        获取通知器，首次调用时创建，启用节流时返回包装了Notifier的NotificationThrottler
+        
+        Returns:
+            Notifier或NotificationThrottler: 通知器实例
+        """
+        if self.notifier is not None:
+            return self.notifier
+        
+        from notify import Notifier
+        notifier = Notifier(self.config.get("webhook_urls", []), logger=self.logger, session=self.get_session())
+        
+        if self.config.get("notify_throttle", True):
+            from throttle import NotificationThrottler
+            notifier = NotificationThrottler(
+                notifier,
+                self.get_state_file("notify_state.json"),
+                dedup_window=self.config.get("notify_dedup_window", 900),
+                summary_interval=self.config.get("notify_summary_interval", 3600),
+                logger=self.logger
+            )
+        
+        self.notifier = notifier
+        return notifier
+    
+    def login(self, retry_count=1, retry_interval=30, force=False):
         """
         执行登录操作，如果配置不完整则直接退出
         
         Args:
             retry_count: 登录失败时的重试次数
             retry_interval: 重试间隔（秒）
+            force: 跳过登录状态检查直接登录，用于已确认会话失效的情况
             
         Returns:
             bool: 登录是否成功
@@ -183,38 +401,67 @@ class AutoLogin:
             self.logger.error(f"配置不完整，请配置{self.config_file}文件设置学号和密码")
             return False
         
-        student_id = self.config.get("student_id")
-        password = self.config.get("password")
+        # 没有可用链路时任何请求都不会成功，跳过全部网络操作、重试和通知
+        if not self.link_is_usable():
+            return False
+        
+        # 单次运行（服务、定时器和NetworkManager钩子）已登录时不会发送通知，在这里发送到期的汇总
+        self.flush_notifications()
+        
+        optimistic = self.config.get("optimistic_login", True)
         
         # 使用ePortal进行登录
         try:
-            portal = ePortal(student_id, password, logger=self.logger)
+            portal = self.get_portal()
             
             # 检查当前是否已成功登录
-            if portal.check_login_status():
+            if not force and portal.check_login_status():
                 self.logger.info("已经成功登录校园网，无需再次登录")
                 return True
                 
             self.logger.info("开始登录校园网...")
-            success, message = portal.login()
+            start_time = time.monotonic()
+            success, message = portal.login(optimistic=optimistic)
             
             # 如果登录失败且有重试次数，则进行重试
             attempts = 1
             while not success and attempts < retry_count:
                 self.logger.warning(f"登录失败，{retry_interval}秒后进行第{attempts+1}/{retry_count}次重试")
                 time.sleep(retry_interval)
+                if not self.link_is_usable():
+                    return False
                 attempts += 1
-                success, message = portal.login()
+                success, message = portal.login(optimistic=optimistic)
+            duration = time.monotonic() - start_time
+            
+            # 登录成功后立即在后台预解析webhook和探测地址，通知发送时可直接复用解析结果
+            prefetch_thread = None
+            if success and self.resolver:
+                prefetch_thread = self.resolver.prefetch(self.config.get("webhook_urls", []) + [
+                    portal.status_check_url,
+                    self.config.get("health_probe_url", "http://www.baidu.com")
+                ])
             
             # 发送通知（如果配置了webhook URLs）
             webhook_urls = self.config.get("webhook_urls")
             if webhook_urls:
-                self.send_notification(success, message, portal.wlan_user_ip)
+                self.send_notification(success, message, portal.wlan_user_ip, duration, portal.wlan_user_ipv6)
             
             if success:
                 self.logger.info(f"登录成功: {message}")
             else:
                 self.logger.error(f"登录失败: {message}")
+            
+            latency_summary = self.get_latency_summary()
+            if latency_summary:
+                self.logger.info(f"连接延迟统计: {latency_summary}")
+            
+            if self.resolver:
+                # 等待预解析完成，避免单次运行退出时预解析结果还未保存
+                if prefetch_thread:
+                    prefetch_thread.join(timeout=PREFETCH_JOIN_TIMEOUT)
+                self.resolver.save()
+                self.logger.debug(f"域名解析缓存统计: {self.resolver.summary()}")
                 
             return success
         except Exception as e:
@@ -225,25 +472,40 @@ class AutoLogin:
             try:
                 webhook_urls = self.config.get("webhook_urls")
                 if webhook_urls:
-                    notifier = Notifier(webhook_urls, logger=self.logger)
+                    notifier = self.get_notifier()
                     error_content = f"校园网登录异常通知\n\n" \
                                     f"学号: {self.config.get('student_id')}\n" \
                                     f"错误信息: {str(e)}\n" \
                                     f"时间: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-                    notifier.send_text(error_content)
+                    if hasattr(notifier, "notify"):
+                        notifier.notify(False, str(e), error_content, critical=True)
+                    else:
+                        notifier.send_text(error_content)
             except Exception:
                 self.logger.error("发送错误通知失败")
             
             return False
     
-    def send_notification(self, success, message, ip_address):
+    def flush_notifications(self):
+        """发送到期的节流汇总通知，未配置webhook或未启用节流时跳过"""
+        if not self.config.get("webhook_urls") or not self.config.get("notify_throttle", True):
+            return
+        
+        try:
+            self.get_notifier().flush()
+        except Exception as e:
+            self.logger.warning(f"发送汇总通知时发生异常: {e}")
+    
+    def send_notification(self, success, message, ip_address, duration=None, ipv6_address=""):
         """
-        发送登录结果通知
+        发送登录结果通知，启用节流时重复结果和链路抖动事件将被合并汇总
         
         Args:
             success: 是否登录成功
             message: 登录结果消息
             ip_address: 当前IP地址
+            duration: 登录耗时（秒）
+            ipv6_address: 当前IPv6地址
         """
         webhook_urls = self.config.get("webhook_urls", [])
         if not webhook_urls:
@@ -252,17 +514,25 @@ class AutoLogin:
         
         self.logger.debug("发送登录结果通知...")
         try:
-            notifier = Notifier(webhook_urls, logger=self.logger)
+            notifier = self.get_notifier()
             
             status = "成功" if success else "失败"
             content = f"校园网登录{status}通知\n\n" \
                      f"学号: {self.config.get('student_id')}\n" \
                      f"IP地址: {ip_address}\n" \
+                     f"IPv6地址: {ipv6_address or '无'}\n" \
                      f"登录结果: {message}\n" \
                      f"程序版本: v{VERSION}\n" \
                      f"时间: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
             
-            if notifier.send_text(content):
+            latency_summary = self.get_latency_summary()
+            if latency_summary:
+                content += f"\n连接延迟: {latency_summary}"
+            
+            if hasattr(notifier, "notify"):
+                if notifier.notify(success, message, content, duration=duration):
+                    self.logger.debug("通知发送成功")
+            elif notifier.send_text(content):
                 self.logger.debug("通知发送成功")
             else:
                 self.logger.warning("通知发送失败")
@@ -278,18 +548,37 @@ class AutoLogin:
         """
         self.logger.info(f"进入守护进程模式，检查间隔: {check_interval}秒")
         
+        if self.config.get("memory_trace_interval", 0) > 0:
+            memstat.start_tracing()
+            self.logger.info(f"已开启内存分配跟踪，每{self.config.get('memory_trace_interval')}个周期记录一次快照")
+        
+        status_file = self.get_state_file("daemon_status.json")
+        status = {"pid": os.getpid(), "version": VERSION, "started": time.time(), "cycles": 0}
+        self.start_health_monitor()
+        
         try:
+            force = False
             while True:
-                # 执行登录操作
-                try:
-                    self.login(retry_count=3, retry_interval=10)
-                except Exception as e:
-                    self.logger.error(f"登录过程中发生异常: {e}")
-                    self.logger.error(traceback.format_exc())
+                self.run_daemon_cycle(status, force=force)
+                self.write_status(status_file, status)
+                force = False
                 
-                # 等待指定时间
-                self.logger.debug(f"休眠{check_interval}秒后再次检查")
-                time.sleep(check_interval)
+                # 等待指定时间，链路不可用时在链路恢复后立即开始下一次检查，
+                # 健康监测发现会话失效时立即重新认证
+                if self.link_usable:
+                    self.logger.debug(f"休眠{check_interval}秒后再次检查")
+                    if self.wake_event.wait(check_interval):
+                        self.wake_event.clear()
+                        # 只有确认被认证系统拦截时才跳过登录状态检查，仅丢包时会话可能仍然有效
+                        force = self.health_monitor is not None and self.health_monitor.last_intercepted
+                        if force:
+                            self.logger.info("会话健康监测发现请求被认证系统拦截，立即重新认证")
+                        else:
+                            self.logger.info("会话健康监测发现连续探测失败，立即检查登录状态")
+                else:
+                    self.logger.debug(f"等待网络链路恢复，最长{check_interval}秒")
+                    if linkstate.wait_for_link(check_interval):
+                        self.logger.info("网络链路已恢复，立即检查登录状态")
                 
         except KeyboardInterrupt:
             self.logger.info("接收到终止信号，程序退出")
@@ -297,6 +586,111 @@ class AutoLogin:
             self.logger.critical(f"守护进程模式发生严重异常: {e}")
             self.logger.critical(traceback.format_exc())
             sys.exit(1)
+        finally:
+            if self.health_monitor:
+                self.health_monitor.stop()
+    
+    def start_health_monitor(self):
+        """
+        根据配置启动会话健康监测，回放时不启动
+        
+        Returns:
+            HealthMonitor: 已启动的监测器，未启用时返回None
+        """
+        interval = self.config.get("health_probe_interval", 10)
+        if interval <= 0 or self.is_replaying():
+            return None
+        
+        from health import HealthMonitor
+        
+        link_check = None
+        if self.config.get("link_gate", True):
+            link_check = lambda: linkstate.check_link()[0]
+        
+        # 监测线程使用独立的会话，避免与主线程共享连接池
+        session = None
+        if self.config.get("dual_stack", True):
+            import dualstack
+            self.get_resolver()
+            session = dualstack.create_session()
+        self.health_monitor = HealthMonitor(
+            self.wake_event,
+            probe_url=self.config.get("health_probe_url", "http://www.baidu.com"),
+            interval=interval,
+            fail_threshold=self.config.get("health_fail_threshold", 2),
+            session=session,
+            link_check=link_check,
+            logger=self.logger
+        )
+        self.health_monitor.start()
+        return self.health_monitor
+    
+    def run_daemon_cycle(self, status, force=False):
+        """
+        执行一个守护进程检查周期，并更新状态信息
+        
+        Args:
+            status: 守护进程状态字典，将被原地更新
+            force: 跳过登录状态检查直接登录
+        """
+        # 执行登录操作
+        success = False
+        try:
+            success = self.login(retry_count=3, retry_interval=10, force=force)
+        except Exception as e:
+            self.logger.error(f"登录过程中发生异常: {e}")
+            self.logger.error(traceback.format_exc())
+        
+        # 低内存模式下每个周期结束后归还空闲内存
+        if self.config.get("low_memory", False):
+            memstat.trim_memory()
+        
+        status["cycles"] += 1
+        status["last_check"] = time.time()
+        status["last_result"] = success
+        status["link_usable"] = self.link_usable
+        if self.health_monitor:
+            status["health"] = self.health_monitor.summary()
+        if self.resolver:
+            status["dns"] = self.resolver.summary()
+        status["rss_kb"] = memstat.get_rss_kb()
+        
+        trace_interval = self.config.get("memory_trace_interval", 0)
+        if trace_interval > 0 and status["cycles"] % trace_interval == 0:
+            status["memory"] = memstat.take_snapshot()
+            self.logger.debug(f"内存快照: RSS {status['rss_kb']}KB，跟踪内存 {status['memory']['traced_kb']}KB")
+    
+    def write_status(self, status_file, status):
+        """
+        将守护进程状态写入状态文件，供status命令读取
+        
+        Args:
+            status_file: 状态文件路径
+            status: 守护进程状态字典
+        """
+        if not status_file:
+            return
+        
+        try:
+            statefile.write_json(status_file, status, ensure_ascii=False, indent=2)
+        except Exception as e:
+            self.logger.warning(f"写入守护进程状态失败: {e}")
+    
+    def show_status(self):
+        """
+        输出守护进程最近一次写入的状态
+        
+        Returns:
+            bool: 是否找到状态信息
+        """
+        status_file = self.find_state_file("daemon_status.json")
+        if not status_file:
+            print("未找到守护进程状态，守护进程可能尚未运行")
+            return False
+        
+        with open(status_file, "r", encoding="utf-8") as f:
+            print(f.read())
+        return True
 
 
 def parse_args():
@@ -307,7 +701,12 @@ def parse_args():
     parser.add_argument("-i", "--interval", type=int, default=300, help="守护进程模式下的检查间隔（秒），默认300秒")
     parser.add_argument("-r", "--retry", type=int, default=3, help="登录失败时的重试次数，默认3次")
     parser.add_argument("-v", "--version", action="store_true", help="显示版本信息")
-    parser.add_argument("command", nargs="?", default="login", help="执行的命令，目前支持: login, daemon")
+    parser.add_argument("--record", metavar="TRACE", help="将认证请求和响应（已脱敏）录制到指定的轨迹文件")
+    parser.add_argument("--replay", metavar="TRACE", help="从指定的轨迹文件回放认证响应，不访问真实网络")
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="回放耗时缩放系数，0表示不等待，默认1.0")
+    parser.add_argument("--replay-drop", type=float, default=0.0, help="回放时丢弃响应的概率，用于故障注入")
+    parser.add_argument("--replay-truncate", type=float, default=0.0, help="回放时截断响应内容的概率，用于故障注入")
+    parser.add_argument("command", nargs="?", default="login", help="执行的命令，目前支持: login, daemon, status")
     
     return parser.parse_args()
 
@@ -325,15 +724,38 @@ def main():
         # 使用指定的配置文件路径创建AutoLogin实例
         auto_login = AutoLogin(config_file=args.config)
         
+        # 配置认证请求的录制或回放
+        if args.replay:
+            from replay import ReplayTransport
+            auto_login.transport = ReplayTransport(
+                args.replay,
+                time_scale=args.replay_speed,
+                drop_rate=args.replay_drop,
+                truncate_rate=args.replay_truncate,
+                logger=auto_login.logger
+            )
+            auto_login.logger.info(f"回放模式，轨迹文件: {args.replay}")
+        elif args.record:
+            from replay import TraceRecorder
+            auto_login.transport = TraceRecorder(
+                args.record,
+                transport=auto_login.get_transport(),
+                secrets=[auto_login.config.get("student_id"), auto_login.config.get("password")],
+                logger=auto_login.logger
+            )
+            auto_login.logger.info(f"录制模式，轨迹文件: {args.record}")
+        
         # 根据命令或参数执行对应操作
         if args.daemon or args.command == "daemon":
             auto_login.daemon_mode(check_interval=args.interval)
         elif args.command == "login":
             success = auto_login.login(retry_count=args.retry)
             sys.exit(0 if success else 1)
+        elif args.command == "status":
+            sys.exit(0 if auto_login.show_status() else 1)
         else:
             auto_login.logger.error(f"未知命令: {args.command}")
-            auto_login.logger.info("可用命令: login, daemon")
+            auto_login.logger.info("可用命令: login, daemon, status")
             sys.exit(1)
             
     except KeyboardInterrupt:
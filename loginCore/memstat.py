@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+内存占用统计模块，供守护进程状态上报和内存基准测试使用
+
+ctypes和tracemalloc只在实际回收内存或跟踪分配时才导入，不增加普通运行的常驻内存。
+"""
+
+import gc
+import sys
+
+_libc = None
+
+
+def get_rss_kb():
+    """
+    获取当前进程的常驻内存（RSS）
+
+    Returns:
+        int: RSS大小（KB），无法读取时返回0
+    """
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+
+def trim_memory():
+    """
+    回收循环引用对象，并在glibc上将空闲堆内存归还给操作系统
+
+    Returns:
+        int: gc回收的对象数量
+    """
+    global _libc
+    collected = gc.collect()
+    try:
+        if _libc is None:
+            import ctypes
+            import ctypes.util
+            _libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6")
+        _libc.malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+    return collected
+
+
+def start_tracing(frames=1):
+    """
+    开启tracemalloc内存分配跟踪（已开启时不重复开启）
+
+    Args:
+        frames: 每次分配记录的调用栈帧数
+    """
+    import tracemalloc
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def take_snapshot(limit=10):
+    """
+    获取一次tracemalloc快照摘要
+
+    Args:
+        limit: 返回的内存分配最多的代码位置数量
+
+    Returns:
+        dict: 包含当前/峰值跟踪内存和主要分配位置的摘要，未开启跟踪时返回None
+    """
+    # 未开启跟踪时tracemalloc不会被导入
+    tracemalloc = sys.modules.get("tracemalloc")
+    if tracemalloc is None or not tracemalloc.is_tracing():
+        return None
+
+    current, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    top = [
+        {"location": str(stat.traceback), "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+        for stat in snapshot.statistics("lineno")[:limit]
+    ]
+    return {
+        "traced_kb": round(current / 1024, 1),
+        "peak_kb": round(peak / 1024, 1),
+        "top": top
+    }
@@ -12,17 +12,23 @@ import platform
 class Notifier:
     """通知模块，用于发送消息通知"""
     
-    def __init__(self, webhook_urls, logger=None):
+    __slots__ = ("logger", "session", "webhook_urls", "proxies")
+    
+    def __init__(self, webhook_urls, logger=None, session=None):
         """
         初始化通知器实例
         
         Args:
             webhook_urls: webhook URL的列表或字符串
             logger: 日志记录器，如果不提供则使用默认的
+            session: 发送HTTP请求的对象（需提供post方法），默认使用requests模块
         """
         # 配置日志记录器
         self.logger = logger if logger else logging.getLogger(__name__)
         
+        # 配置HTTP传输
+        self.session = session if session else requests
+        
         if isinstance(webhook_urls, str):
             self.webhook_urls = [webhook_urls]
         elif isinstance(webhook_urls, list):
@@ -199,7 +205,7 @@ class Notifier:
                 while retry_count < max_retries:
                     try:
                         # 使用系统代理发送请求
-                        response = requests.post(
+                        response = self.session.post(
                             webhook, 
                             headers=headers, 
                             data=json.dumps(data),
@@ -6,12 +6,19 @@ import socket
 import re
 import json
 import logging
-from requests.exceptions import RequestException, Timeout, ConnectionError
+from requests.exceptions import RequestException, Timeout, ConnectTimeout, ConnectionError
+
+import linkstate
 
 class ePortal:
     """安徽大学校园网自动登录类"""
     
-    def __init__(self, user_account, user_password, logger=None):
+    __slots__ = (
+        "user_account", "user_password", "base_url", "login_url", "campus_check_url",
+        "status_check_url", "headers", "logger", "transport", "wlan_user_ip", "wlan_user_ipv6"
+    )
+    
+    def __init__(self, user_account, user_password, logger=None, transport=None):
         """
         初始化ePortal实例
         
@@ -19,12 +26,15 @@ class ePortal:
             user_account: 学号
             user_password: 密码
             logger: 日志记录器，如果不提供则使用默认的
+            transport: 发送HTTP请求的对象（需提供get方法），默认使用requests模块，
+                       可替换为replay模块中的TraceRecorder或ReplayTransport
         """
         self.user_account = user_account
         self.user_password = user_password
         self.base_url = "http://172.16.253.3:801/eportal/"
         self.login_url = f"{self.base_url}?c=Portal&a=login&callback=dr1003&login_method=1&jsVersion=3.3.2&v=1117"
         self.campus_check_url = "http://172.16.253.3/a79.htm"
+        self.status_check_url = "http://www.baidu.com"
         self.headers = {
             "Accept": "*/*",
             "Accept-Language": "zh-CN,zh;q=0.9",
@@ -37,9 +47,19 @@ class ePortal:
         # 配置日志记录器
         self.logger = logger if logger else logging.getLogger(__name__)
         
+        # 配置HTTP传输
+        self.transport = transport if transport else requests
+        
         # 获取用户IP
+        self.refresh_addresses()
+    
+    def refresh_addresses(self):
+        """重新获取本机IPv4/IPv6地址，复用实例时在每次登录前调用"""
         self.wlan_user_ip = self.get_local_ip()
         self.logger.debug(f"当前IP地址: {self.wlan_user_ip}")
+        self.wlan_user_ipv6 = self.get_local_ipv6()
+        if self.wlan_user_ipv6:
+            self.logger.debug(f"当前IPv6地址: {self.wlan_user_ipv6}")
     
     def get_local_ip(self):
         """
@@ -94,6 +114,37 @@ class ePortal:
         self.logger.warning(f"所有IP获取方法均失败，使用默认IP: {ip_address}")
         return ip_address
     
+    def get_local_ipv6(self):
+        """
+        获取本机全局IPv6地址，IPv4尚未就绪时也可以单独获取
+        
+        Returns:
+            str: 本机IPv6地址，没有可用的全局IPv6地址时返回空字符串
+        """
+        # 方法1: 通过socket连接获取IPv6地址（不会真正发送数据）
+        try:
+            s = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
+            s.settimeout(2)
+            s.connect(("2400:3200::1", 80))
+            ip_address = s.getsockname()[0]
+            s.close()
+            if not ip_address.lower().startswith("fe80"):
+                self.logger.debug(f"通过socket连接获取IPv6地址成功: {ip_address}")
+                return ip_address
+        except Exception as e:
+            self.logger.debug(f"通过socket连接获取IPv6地址失败: {e}")
+        
+        # 方法2: 从/proc/net/if_inet6中查找默认路由接口上可用的全局地址
+        try:
+            ip_address = linkstate.get_default_ipv6_address()
+            if ip_address:
+                self.logger.debug(f"通过/proc/net/if_inet6获取IPv6地址成功: {ip_address}")
+                return ip_address
+        except Exception as e:
+            self.logger.debug(f"通过/proc/net/if_inet6获取IPv6地址失败: {e}")
+        
+        return ""
+    
     def is_connected_to_campus_network(self):
         """
         检查是否已连接到校园网（但可能尚未认证）
@@ -103,7 +154,7 @@ class ePortal:
         """
         try:
             self.logger.debug("检查是否已连接到校园网...")
-            response = requests.get(self.campus_check_url, timeout=5, headers=self.headers)
+            response = self.transport.get(self.campus_check_url, timeout=5, headers=self.headers)
             is_connected = response.status_code == 200
             self.logger.debug(f"校园网连接状态: {'已连接' if is_connected else '未连接'}")
             return is_connected
@@ -117,19 +168,53 @@ class ePortal:
             self.logger.warning(f"检查校园网连接时发生异常: {e}")
             return False
     
-    def login(self):
+    def login(self, optimistic=False):
         """
         执行登录操作，包含完整的异常处理和重试机制
         
+        Args:
+            optimistic: 是否使用乐观模式。乐观模式下直接以较短的连接超时发送登录请求，
+                        仅当连接已建立但未得到响应时才回退到完整的校园网连接检查，
+                        从而在通常情况下省去一次对认证页面的请求
+        
         Returns:
             bool: 登录是否成功
             str: 登录结果信息
         """
+        if optimistic:
+            success, message, responded, reachable = self._send_login(max_retries=1, timeout=(3, 10), fail_fast=True)
+            if success or responded:
+                return success, message
+            # 校园网连接检查访问的是同一台服务器，无法建立连接时不再重复检查
+            if not reachable:
+                self.logger.warning("无法连接到校园网认证服务器，可能尚未连接校园网")
+                return False, message
+            self.logger.debug("登录请求未得到认证服务器响应，回退到完整的校园网连接检查")
+        
         # 首先检查是否已连接到校园网
         if not self.is_connected_to_campus_network():
             self.logger.warning("尚未连接校园网，登录失败")
             return False, "尚未连接校园网"
-            
+        
+        success, message, _, _ = self._send_login()
+        return success, message
+    
+    def _send_login(self, max_retries=3, timeout=10, fail_fast=False):
+        """
+        发送登录请求并解析返回结果
+        
+        Args:
+            max_retries: 登录请求超时时的最大尝试次数
+            timeout: 请求超时（秒），可以是(连接超时, 读取超时)元组
+            fail_fast: 连接超时时不再重试直接返回，用于乐观登录尝试
+        
+        Returns:
+            bool: 登录是否成功
+            str: 登录结果信息
+            bool: 认证服务器是否返回了HTTP响应
+            bool: 是否与认证服务器建立了连接
+        """
+        response = None
         try:
             # 构建登录参数
             params = {
@@ -140,7 +225,7 @@ class ePortal:
                 "user_account": self.user_account,
                 "user_password": self.user_password,
                 "wlan_user_ip": self.wlan_user_ip,
-                "wlan_user_ipv6": "",
+                "wlan_user_ipv6": self.wlan_user_ipv6,
                 "wlan_user_mac": "000000000000",
                 "wlan_ac_ip": "",
                 "wlan_ac_name": "",
@@ -152,30 +237,32 @@ class ePortal:
             
             # 发送登录请求（添加重试机制）
             retry_count = 0
-            max_retries = 3
             
             while retry_count < max_retries:
                 try:
-                    response = requests.get(
+                    response = self.transport.get(
                         self.login_url, 
                         params=params,
                         headers=self.headers,
-                        timeout=10
+                        timeout=timeout
                     )
                     break
-                except Timeout:
+                except Timeout as e:
+                    if fail_fast and isinstance(e, ConnectTimeout):
+                        self.logger.error("连接校园网认证服务器超时")
+                        return False, "连接校园网认证服务器超时，请检查网络连接", False, False
                     retry_count += 1
                     if retry_count < max_retries:
                         self.logger.warning(f"登录请求超时，正在进行第{retry_count}次重试...")
                     else:
                         self.logger.error("登录请求超时，已达到最大重试次数")
-                        return False, "登录请求超时，请检查网络连接"
+                        return False, "登录请求超时，请检查网络连接", False, True
                 except ConnectionError:
                     self.logger.error("网络连接错误，无法连接到校园网认证服务器")
-                    return False, "无法连接到校园网认证服务器，请检查网络连接"
+                    return False, "无法连接到校园网认证服务器，请检查网络连接", False, False
                 except Exception as e:
                     self.logger.error(f"发送登录请求时发生未知异常: {e}")
-                    return False, f"登录过程中发生异常: {str(e)}"
+                    return False, f"登录过程中发生异常: {str(e)}", False, True
             
             # 处理返回结果
             if response.status_code == 200:
@@ -187,22 +274,22 @@ class ePortal:
                     result = json.loads(json_str.group(1))
                     if result.get("result") == "1":
                         self.logger.info(f"用户 {self.user_account} 登录成功")
-                        return True, "登录成功"
+                        return True, "登录成功", True, True
                     else:
                         error_msg = result.get("msg", "登录失败，未知原因")
                         self.logger.warning(f"登录失败: {error_msg}")
-                        return False, error_msg
+                        return False, error_msg, True, True
                 else:
                     self.logger.error("登录失败，无法解析返回数据")
                     self.logger.debug(f"服务器返回内容: {response.text[:200]}...")
-                    return False, "登录失败，无法解析返回数据"
+                    return False, "登录失败，无法解析返回数据", True, True
             else:
                 self.logger.error(f"登录失败，HTTP状态码: {response.status_code}")
-                return False, f"登录失败，HTTP状态码: {response.status_code}"
+                return False, f"登录失败，HTTP状态码: {response.status_code}", True, True
         
         except Exception as e:
             self.logger.error(f"登录过程中发生异常: {e}")
-            return False, f"登录过程中发生异常: {str(e)}"
+            return False, f"登录过程中发生异常: {str(e)}", response is not None, True
     
     def check_login_status(self):
         """
@@ -213,8 +300,7 @@ class ePortal:
         """
         try:
             # 尝试访问外部网站检查是否已登录
-            test_url = "http://www.baidu.com"
-            response = requests.get(test_url, timeout=5)
+            response = self.transport.get(self.status_check_url, timeout=5)
             return response.status_code == 200
         except Exception:
             return False
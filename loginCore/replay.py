@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+认证交互录制与回放模块
+
+TraceRecorder 包装真实的HTTP传输，将每次请求/响应及耗时写入脱敏的轨迹文件（JSON Lines）；
+ReplayTransport 读取轨迹文件，按原始或缩放后的耗时回放响应，并支持丢弃响应、截断JSONP等故障注入。
+两者都提供与 requests 模块相同的 get/post 接口，可作为 ePortal 的 transport 参数使用。
+"""
+
+import json
+import re
+import time
+import random
+import logging
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.exceptions import Timeout, ReadTimeout, ConnectTimeout, ConnectionError
+
+# 需要脱敏的请求参数
+SECRET_PARAMS = ("user_account", "user_password")
+REDACTED = "***"
+
+# 录制的异常类型名与回放时抛出的异常，其他异常均按ConnectionError回放
+RECORDED_ERRORS = {
+    "ReadTimeout": ReadTimeout,
+    "ConnectTimeout": ConnectTimeout,
+    "Timeout": Timeout,
+    "ConnectionError": ConnectionError
+}
+
+# 认证服务器返回的状态码字段，值不可能是用户数据，即使与较短的密码相同也不脱敏
+STATUS_FIELDS = ("result", "ret_code", "retcode", "code")
+
+# 文本中的JSON字符串键值对，以及查询字符串/表单中的敏感参数
+JSON_PAIR_PATTERN = re.compile(r'"((?:[^"\\]|\\.)*)"(\s*:\s*)"((?:[^"\\]|\\.)*)"')
+SECRET_FIELD_PATTERN = re.compile(r'\b(' + "|".join(SECRET_PARAMS) + r')=[^&\s"\']*')
+
+
+def _strip_query(url):
+    """去掉URL中的查询字符串和片段，用于匹配和脱敏"""
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))
+
+
+class TraceRecorder:
+    """录制传输层，记录每次HTTP交互到轨迹文件"""
+
+    def __init__(self, trace_file, transport=None, secrets=None, logger=None):
+        """
+        初始化录制器实例
+
+        Args:
+            trace_file: 轨迹文件路径，记录将以追加方式写入
+            transport: 实际发送请求的对象，默认使用requests模块
+            secrets: 需要在轨迹中脱敏的字符串列表（如学号、密码）
+            logger: 日志记录器，如果不提供则使用默认的
+        """
+        self.trace_file = trace_file
+        self.transport = transport if transport else requests
+        self.secrets = [s for s in (secrets or []) if s]
+
+        # 配置日志记录器
+        self.logger = logger if logger else logging.getLogger(__name__)
+
+    def get(self, url, **kwargs):
+        """发送GET请求并记录"""
+        return self._request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        """发送POST请求并记录"""
+        return self._request("POST", url, **kwargs)
+
+    def _redact_value(self, value):
+        """
+        值与敏感字符串完全相同时替换为脱敏标记
+
+        Args:
+            value: 参数值
+
+        Returns:
+            str: 脱敏后的值
+        """
+        return REDACTED if value in self.secrets else value
+
+    def _redact(self, text):
+        """
+        将响应文本中的敏感参数，以及值等于敏感字符串的JSON字段替换为脱敏标记
+
+        不做子串替换，并跳过状态码字段，避免较短的密码（如"1"）改写"result":"1"等内容而破坏轨迹。
+
+        Args:
+            text: 原始文本
+
+        Returns:
+            str: 脱敏后的文本
+        """
+        if not text:
+            return text
+        text = SECRET_FIELD_PATTERN.sub(lambda m: f"{m.group(1)}={REDACTED}", text)
+
+        def replace(match):
+            key, separator, raw_value = match.groups()
+            if key in SECRET_PARAMS:
+                return f'"{key}"{separator}"{REDACTED}"'
+            if key in STATUS_FIELDS:
+                return match.group(0)
+            try:
+                value = json.loads(f'"{raw_value}"')
+            except ValueError:
+                return match.group(0)
+            return f'"{key}"{separator}"{REDACTED}"' if value in self.secrets else match.group(0)
+
+        return JSON_PAIR_PATTERN.sub(replace, text)
+
+    def _request(self, method, url, **kwargs):
+        """
+        发送请求，并将请求、响应和耗时写入轨迹文件
+
+        Returns:
+            Response: 原始响应对象，异常会在记录后继续抛出
+        """
+        params = dict(kwargs.get("params") or {})
+        for key in SECRET_PARAMS:
+            if key in params:
+                params[key] = REDACTED
+
+        entry = {
+            "time": time.time(),
+            "method": method,
+            "url": _strip_query(url),
+            "params": {k: self._redact_value(str(v)) for k, v in params.items()},
+            "timeout": kwargs.get("timeout")
+        }
+
+        start_time = time.monotonic()
+        try:
+            response = getattr(self.transport, method.lower())(url, **kwargs)
+            entry["status_code"] = response.status_code
+            entry["text"] = self._redact(response.text)
+            return response
+        except Exception as e:
+            entry["error"] = type(e).__name__
+            raise
+        finally:
+            entry["elapsed"] = round(time.monotonic() - start_time, 4)
+            self._write(entry)
+
+    def _write(self, entry):
+        """追加一条记录到轨迹文件，写入失败不影响正常登录流程"""
+        try:
+            with open(self.trace_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except Exception as e:
+            self.logger.warning(f"写入轨迹文件 {self.trace_file} 失败: {e}")
+
+
+class ReplayResponse:
+    """回放得到的响应对象，提供ePortal和Notifier使用到的Response属性"""
+
+    __slots__ = ("status_code", "text", "url")
+
+    def __init__(self, status_code, text, url):
+        self.status_code = status_code
+        self.text = text
+        self.url = url
+
+    def json(self):
+        """将响应内容解析为JSON"""
+        return json.loads(self.text)
+
+
+class ReplayTransport:
+    """回放传输层，按录制顺序返回轨迹文件中的响应"""
+
+    def __init__(self, trace_file, time_scale=1.0, drop_rate=0.0, truncate_rate=0.0, seed=None, logger=None):
+        """
+        初始化回放实例
+
+        Args:
+            trace_file: 轨迹文件路径
+            time_scale: 耗时缩放系数，1.0为原始耗时，0表示不等待
+            drop_rate: 丢弃响应的概率，被丢弃的请求将抛出Timeout
+            truncate_rate: 截断响应内容的概率，用于模拟不完整的JSONP
+            seed: 随机数种子，便于复现故障注入结果
+            logger: 日志记录器，如果不提供则使用默认的
+        """
+        self.time_scale = time_scale
+        self.drop_rate = drop_rate
+        self.truncate_rate = truncate_rate
+        self.random = random.Random(seed)
+
+        # 配置日志记录器
+        self.logger = logger if logger else logging.getLogger(__name__)
+
+        # 按请求方法和地址分组，每组按录制顺序回放
+        self.queues = {}
+        with open(trace_file, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                self.queues.setdefault((entry["method"], entry["url"]), []).append(entry)
+
+    def get(self, url, **kwargs):
+        """回放GET请求"""
+        return self._request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        """回放POST请求"""
+        return self._request("POST", url, **kwargs)
+
+    def _sleep(self, seconds):
+        """按缩放系数等待"""
+        if self.time_scale > 0 and seconds:
+            time.sleep(seconds * self.time_scale)
+
+    @staticmethod
+    def _read_timeout(timeout):
+        """
+        获取读取超时，timeout可以是requests支持的(连接超时, 读取超时)元组
+
+        Returns:
+            float: 读取超时（秒），未设置时为None
+        """
+        if isinstance(timeout, tuple):
+            return timeout[1]
+        return timeout
+
+    def _request(self, method, url, **kwargs):
+        """
+        取出下一条匹配的记录并按记录结果返回响应或抛出异常
+
+        Returns:
+            ReplayResponse: 回放的响应
+        """
+        key = (method, _strip_query(url))
+        queue = self.queues.get(key)
+        if not queue:
+            self.logger.debug(f"轨迹中没有剩余的匹配记录: {method} {key[1]}")
+            raise ConnectionError(f"轨迹中没有 {method} {key[1]} 的记录")
+
+        # 最后一条记录保留，供后续重复请求（如守护进程模式）继续使用
+        entry = queue.pop(0) if len(queue) > 1 else queue[0]
+        timeout = self._read_timeout(kwargs.get("timeout"))
+
+        if self.drop_rate and self.random.random() < self.drop_rate:
+            self.logger.debug(f"故障注入: 丢弃响应 {method} {key[1]}")
+            self._sleep(timeout if timeout else entry.get("elapsed", 0))
+            raise ReadTimeout(f"故障注入: {method} {key[1]} 的响应被丢弃")
+
+        # 缩放后的耗时超过调用方的读取超时时按超时回放，使回放的延迟劣化能够表现为超时
+        elapsed = entry.get("elapsed", 0)
+        if timeout and elapsed * self.time_scale > timeout:
+            time.sleep(timeout)
+            raise ReadTimeout(f"回放耗时{elapsed * self.time_scale:.1f}秒超过读取超时{timeout}秒: {method} {key[1]}")
+        self._sleep(elapsed)
+
+        error = entry.get("error")
+        if error:
+            error_class = RECORDED_ERRORS.get(error, ConnectionError)
+            raise error_class(f"回放录制的异常 {error}: {method} {key[1]}")
+
+        text = entry.get("text") or ""
+        if self.truncate_rate and self.random.random() < self.truncate_rate:
+            self.logger.debug(f"故障注入: 截断响应 {method} {key[1]}")
+            text = text[:len(text) // 2]
+
+        return ReplayResponse(entry.get("status_code", 200), text, url)
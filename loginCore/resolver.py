@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+域名解析缓存模块
+
+在进程内缓存系统解析器的结果（包括解析失败的否定缓存），并可保存到文件供下一次独立运行使用。
+登录成功后可在后台预先解析webhook和探测地址的域名，避免认证完成后的首批请求等待上游DNS预热。
+系统解析器不提供记录的TTL，缓存有效期由配置的ttl和negative_ttl决定。
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+import logging
+from urllib.parse import urlsplit
+
+import statefile
+
+
+class ResolverCache:
+    """带TTL和否定缓存的域名解析缓存"""
+
+    __slots__ = (
+        "cache_file", "ttl", "negative_ttl", "logger", "entries", "stats",
+        "_lock", "_save_lock", "_inflight", "_dirty"
+    )
+
+    def __init__(self, cache_file=None, ttl=300, negative_ttl=30, logger=None):
+        """
+        初始化解析缓存实例
+
+        Args:
+            cache_file: 缓存文件路径，为None时只在进程内缓存
+            ttl: 解析成功结果的有效期（秒）
+            negative_ttl: 解析失败结果的有效期（秒）
+            logger: 日志记录器，如果不提供则使用默认的
+        """
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+        # 配置日志记录器
+        self.logger = logger if logger else logging.getLogger(__name__)
+
+        # 主机名 -> {"addrs": [[地址族, IP], ...], "expires": 过期时间戳}，addrs为空表示否定缓存
+        self.entries = {}
+        self.stats = {
+            "hits": 0, "misses": 0, "negative_hits": 0, "lookups": 0, "failures": 0, "resolve_time": 0.0
+        }
+        self._lock = threading.Lock()
+        # 预解析线程和主线程可能同时保存
+        self._save_lock = threading.Lock()
+        self._inflight = {}
+        self._dirty = False
+
+        self.load()
+
+    def load(self):
+        """从缓存文件加载未过期的记录"""
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+            now = time.time()
+            with self._lock:
+                for host, entry in entries.items():
+                    if entry.get("expires", 0) > now:
+                        self.entries[host] = entry
+            self.logger.debug(f"已加载{len(self.entries)}条域名解析缓存")
+        except Exception as e:
+            self.logger.warning(f"加载域名解析缓存失败: {e}")
+
+    def save(self):
+        """将未过期的记录保存到缓存文件，没有变化时跳过"""
+        if not self.cache_file or not self._dirty:
+            return
+
+        with self._save_lock:
+            now = time.time()
+            with self._lock:
+                entries = {host: entry for host, entry in self.entries.items() if entry["expires"] > now}
+                self._dirty = False
+
+            try:
+                statefile.write_json(self.cache_file, entries)
+            except Exception as e:
+                self.logger.warning(f"保存域名解析缓存失败: {e}")
+
+    @staticmethod
+    def _is_literal(host):
+        """判断主机名是否为IP地址字面量"""
+        for family in (socket.AF_INET, socket.AF_INET6):
+            try:
+                socket.inet_pton(family, host)
+                return True
+            except OSError:
+                continue
+        return False
+
+    @staticmethod
+    def _to_addrinfo(addrs, port):
+        """将缓存的地址转换为socket.getaddrinfo格式的结果"""
+        infos = []
+        for family, ip in addrs:
+            sockaddr = (ip, port, 0, 0) if family == socket.AF_INET6 else (ip, port)
+            infos.append((family, socket.SOCK_STREAM, socket.IPPROTO_TCP, "", sockaddr))
+        return infos
+
+    def _lookup(self, host):
+        """
+        调用系统解析器解析主机名并写入缓存
+
+        Returns:
+            list: [[地址族, IP], ...]，解析失败时为空列表
+        """
+        start_time = time.monotonic()
+        try:
+            infos = socket.getaddrinfo(host, None, socket.AF_UNSPEC, socket.SOCK_STREAM)
+            addrs = []
+            for family, _, _, _, sockaddr in infos:
+                if family in (socket.AF_INET, socket.AF_INET6) and [family, sockaddr[0]] not in addrs:
+                    addrs.append([family, sockaddr[0]])
+            error = None
+        except socket.gaierror as e:
+            addrs = []
+            error = e
+
+        elapsed = time.monotonic() - start_time
+        with self._lock:
+            self.stats["lookups"] += 1
+            self.stats["resolve_time"] += elapsed
+            if error:
+                self.stats["failures"] += 1
+            self.entries[host] = {
+                "addrs": addrs,
+                "expires": time.time() + (self.ttl if addrs else self.negative_ttl)
+            }
+            self._dirty = True
+
+        if error:
+            self.logger.debug(f"解析 {host} 失败（耗时{elapsed * 1000:.1f}ms）: {error}")
+        else:
+            self.logger.debug(f"解析 {host} 完成，耗时{elapsed * 1000:.1f}ms，共{len(addrs)}个地址")
+        return addrs
+
+    def _lookup_exclusive(self, host):
+        """
+        在没有其他线程解析同一主机名时执行解析
+
+        Returns:
+            list: 解析结果，其他线程正在解析时返回None
+        """
+        with self._lock:
+            if host in self._inflight:
+                return None
+            waiter = threading.Event()
+            self._inflight[host] = waiter
+
+        try:
+            return self._lookup(host)
+        finally:
+            with self._lock:
+                self._inflight.pop(host, None)
+            waiter.set()
+
+    def getaddrinfo(self, host, port):
+        """
+        解析主机名，接口与socket.getaddrinfo(host, port, AF_UNSPEC, SOCK_STREAM)一致
+
+        同一主机名正在被其他线程解析时，会等待该次解析完成并复用其结果。
+
+        Args:
+            host: 主机名或IP地址
+            port: 端口
+
+        Returns:
+            list: getaddrinfo格式的地址列表
+
+        Raises:
+            socket.gaierror: 主机名无法解析（包括命中否定缓存）
+        """
+        if self._is_literal(host):
+            return socket.getaddrinfo(host, port, socket.AF_UNSPEC, socket.SOCK_STREAM)
+
+        while True:
+            with self._lock:
+                entry = self.entries.get(host)
+                if entry and entry["expires"] > time.time():
+                    if entry["addrs"]:
+                        self.stats["hits"] += 1
+                        return self._to_addrinfo(entry["addrs"], port)
+                    self.stats["negative_hits"] += 1
+                    raise socket.gaierror(socket.EAI_NONAME, f"{host} 解析失败（否定缓存）")
+
+                waiter = self._inflight.get(host)
+                if waiter is None:
+                    self.stats["misses"] += 1
+
+            if waiter is None:
+                addrs = self._lookup_exclusive(host)
+                if addrs is not None:
+                    break
+            else:
+                # 其他线程正在解析该主机名，等待完成后重新查询缓存
+                waiter.wait()
+
+        if not addrs:
+            raise socket.gaierror(socket.EAI_NONAME, f"{host} 解析失败")
+        return self._to_addrinfo(addrs, port)
+
+    def prefetch(self, urls, background=True):
+        """
+        预先解析一组URL的主机名，已缓存且未过期的主机名会被刷新
+
+        Args:
+            urls: URL列表
+            background: 是否在后台线程中解析
+
+        Returns:
+            threading.Thread: 后台线程，同步执行时返回None
+        """
+        hosts = []
+        for url in urls:
+            host = urlsplit(url).hostname
+            if host and host not in hosts and not self._is_literal(host):
+                hosts.append(host)
+
+        def run():
+            for host in hosts:
+                self._lookup_exclusive(host)
+            self.save()
+
+        if not hosts:
+            return None
+        if not background:
+            run()
+            return None
+
+        self.logger.debug(f"后台预解析域名: {', '.join(hosts)}")
+        thread = threading.Thread(target=run, name="ResolverPrefetch", daemon=True)
+        thread.start()
+        return thread
+
+    def summary(self):
+        """
+        生成缓存命中统计
+
+        Returns:
+            dict: 命中、未命中、否定缓存命中、解析失败次数和平均解析耗时
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats["lookups"]
+        resolve_time = stats.pop("resolve_time")
+        stats["avg_resolve_ms"] = round(resolve_time / lookups * 1000, 1) if lookups else None
+        stats["entries"] = len(self.entries)
+        return stats
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+状态文件读写模块
+
+守护进程、NetworkManager钩子和定时器可能同时写入同一个状态文件，
+写入时先写到同目录下唯一的临时文件再原子替换，读取方永远不会看到不完整的内容。
+"""
+
+import json
+import os
+import tempfile
+
+
+def write_json(path, data, mode=0o644, **kwargs):
+    """
+    原子地将数据以JSON格式写入文件
+
+    Args:
+        path: 目标文件路径
+        data: 要写入的数据
+        mode: 文件权限，默认所有用户可读，便于非root用户查看状态
+        **kwargs: 传递给json.dump的参数
+
+    Raises:
+        OSError: 写入或替换失败，临时文件会被清理
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_file = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        os.fchmod(fd, mode)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, **kwargs)
+        os.replace(tmp_file, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_file)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import time
+import datetime
+import logging
+import statistics
+
+import statefile
+
+# 汇总中保留的恢复耗时样本数上限，避免长时间抖动时状态无限增长
+MAX_DURATION_SAMPLES = 100
+
+
+class NotificationThrottler:
+    """通知节流模块，对重复的登录结果去重，并将链路抖动期间的事件汇总发送"""
+
+    __slots__ = ("notifier", "state_file", "dedup_window", "summary_interval", "logger", "state")
+
+    def __init__(self, notifier, state_file, dedup_window=900, summary_interval=3600, logger=None):
+        """
+        初始化通知节流器实例
+
+        Args:
+            notifier: Notifier实例，用于实际发送消息
+            state_file: 节流状态文件路径，用于在多次独立运行之间共享状态
+            dedup_window: 去重窗口（秒），窗口内相同的结果只通知一次
+            summary_interval: 汇总间隔（秒），被抑制的事件每隔该时间汇总发送一次
+            logger: 日志记录器，如果不提供则使用默认的
+        """
+        self.notifier = notifier
+        self.state_file = state_file
+        self.dedup_window = dedup_window
+        self.summary_interval = summary_interval
+
+        # 配置日志记录器
+        self.logger = logger if logger else logging.getLogger(__name__)
+
+        self.state = self._load_state()
+
+    def _load_state(self):
+        """
+        加载节流状态，文件不存在或损坏时返回空状态
+
+        Returns:
+            dict: 节流状态
+        """
+        state = {
+            "last_state": None,
+            "last_transition": 0,
+            "last_sent_key": None,
+            "last_sent": 0,
+            "window_start": 0,
+            "pending": None
+        }
+
+        if self.state_file and os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, "r", encoding="utf-8") as f:
+                    state.update(json.load(f))
+            except Exception as e:
+                self.logger.warning(f"加载通知节流状态失败，将重新开始计数: {e}")
+
+        if not isinstance(state.get("pending"), dict):
+            state["pending"] = None
+
+        return state
+
+    def _save_state(self):
+        """保存节流状态，先写临时文件再替换，避免并发运行时读到不完整的内容"""
+        if not self.state_file:
+            return
+
+        try:
+            statefile.write_json(self.state_file, self.state, ensure_ascii=False)
+        except Exception as e:
+            self.logger.warning(f"保存通知节流状态失败: {e}")
+
+    def notify(self, success, message, content, duration=None, critical=False):
+        """
+        提交一次登录结果，根据节流规则决定立即发送还是并入汇总
+
+        以下情况会立即发送：
+        - 标记为critical的事件（如未处理的异常）
+        - 第一次登录结果
+        - 登录状态发生变化，且之前的状态已稳定超过去重窗口
+        - 从失败恢复为成功，且之前的失败通知已发送（避免用户只收到失败通知）
+        - 与上一次已发送的结果不同的非状态变化事件
+
+        其余事件（窗口内的重复结果、链路抖动导致的频繁状态变化）将被记录，
+        并在汇总间隔到达时合并为一条汇总通知发送。
+
+        Args:
+            success: 是否登录成功
+            message: 登录结果消息
+            content: 立即发送时使用的完整通知内容
+            duration: 本次登录耗时（秒），用于统计恢复时间
+            critical: 是否为必须立即发送的关键事件
+
+        Returns:
+            bool: 本次事件是否已立即发送成功
+        """
+        now = time.time()
+        key = [bool(success), message]
+
+        # 重新加载状态，以便守护进程复用实例时也能看到其他进程（如NetworkManager钩子）的更新
+        if self.state_file:
+            self.state = self._load_state()
+        last_state = self.state.get("last_state")
+
+        is_transition = last_state is not None and last_state != bool(success)
+        last_transition = self.state.get("last_transition", 0)
+        stable_for = now - last_transition
+        last_sent_key = self.state.get("last_sent_key")
+        failure_was_sent = bool(last_sent_key) and not last_sent_key[0] and \
+                           self.state.get("last_sent", 0) >= last_transition
+        if last_state is None or is_transition:
+            self.state["last_state"] = bool(success)
+            self.state["last_transition"] = now
+
+        if critical or last_state is None:
+            send_now = True
+        elif is_transition:
+            # 只有对应的失败通知也被抑制时才节流恢复通知
+            send_now = stable_for >= self.dedup_window or (success and failure_was_sent)
+        else:
+            send_now = key != self.state.get("last_sent_key") or \
+                       now - self.state.get("last_sent", 0) >= self.dedup_window
+
+        sent = False
+        if send_now:
+            sent = self.notifier.send_text(content)
+            if sent:
+                self.state["last_sent_key"] = key
+                self.state["last_sent"] = now
+        else:
+            self.logger.debug(f"通知已被节流: 登录{'成功' if success else '失败'} - {message}")
+            self._add_pending(success, message, duration, now)
+
+        self.flush(now=now)
+        self._save_state()
+        return sent
+
+    def _add_pending(self, success, message, duration, now):
+        """
+        将被抑制的事件累加到汇总中，只保留计数和有限数量的耗时样本
+
+        Args:
+            success: 是否登录成功
+            message: 登录结果消息
+            duration: 登录耗时（秒）
+            now: 当前时间戳
+        """
+        pending = self.state.get("pending")
+        if not pending:
+            pending = {"succeeded": 0, "failed": 0, "durations": [], "last": None}
+            self.state["pending"] = pending
+            self.state["window_start"] = now
+
+        if success:
+            pending["succeeded"] += 1
+            if duration is not None:
+                pending["durations"].append(round(duration, 3))
+                del pending["durations"][:-MAX_DURATION_SAMPLES]
+        else:
+            pending["failed"] += 1
+        pending["last"] = [bool(success), message]
+
+    def flush(self, force=False, now=None):
+        """
+        如果汇总间隔已到（或force为True），发送被抑制事件的汇总通知
+
+        Args:
+            force: 是否忽略汇总间隔立即发送
+            now: 当前时间戳，默认使用time.time()
+
+        Returns:
+            bool: 是否发送了汇总通知
+        """
+        if now is None and self.state_file:
+            self.state = self._load_state()
+        pending = self.state.get("pending")
+        if not pending:
+            return False
+
+        now = now if now is not None else time.time()
+        if not force and now - self.state.get("window_start", now) < self.summary_interval:
+            return False
+
+        if not self.notifier.send_text(self._format_summary(pending, now)):
+            self.logger.warning("发送汇总通知失败，将在下次检查时重试")
+            return False
+
+        self.logger.debug(f"已发送{pending['succeeded'] + pending['failed']}条被节流事件的汇总通知")
+        self.state["last_sent_key"] = pending["last"]
+        self.state["last_sent"] = now
+        self.state["pending"] = None
+        self.state["window_start"] = 0
+        self._save_state()
+        return True
+
+    def _format_summary(self, pending, now):
+        """
+        生成汇总通知内容
+
+        Args:
+            pending: 被抑制事件的汇总
+            now: 当前时间戳
+
+        Returns:
+            str: 汇总通知内容
+        """
+        minutes = max(1, int((now - self.state.get("window_start", now)) / 60))
+        last_success, last_message = pending["last"]
+
+        content = f"校园网连接波动汇总通知\n\n" \
+                  f"最近{minutes}分钟内重新登录{pending['succeeded']}次，登录失败{pending['failed']}次\n"
+        if pending["durations"]:
+            content += f"中位恢复耗时: {statistics.median(pending['durations']):.1f}秒\n"
+        content += f"最近结果: {'成功' if last_success else '失败'} - {last_message}\n" \
+                   f"时间: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        return content
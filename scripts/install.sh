@@ -11,6 +11,7 @@ NC='\033[0m' # No Color
 
 # 配置文件和安装目录
 INSTALL_DIR="/usr/local/bin"
+LIB_DIR="/usr/local/lib/autonet4ahu"
 CONFIG_DIR="/etc/autonet4ahu"
 CONFIG_FILE="${CONFIG_DIR}/config.json"
 SYSTEMD_SERVICE_DIR="/etc/systemd/system"
@@ -20,6 +21,10 @@ PARENT_DIR="$(dirname "$SCRIPT_DIR")"
 EXECUTABLE_NAME="autonet4ahu"
 EXECUTABLE_PATH="${INSTALL_DIR}/${EXECUTABLE_NAME}"
 BINARY_PATH="${PARENT_DIR}/dist/${EXECUTABLE_NAME}"
+ONEDIR_PATH="${PARENT_DIR}/dist/onedir/${EXECUTABLE_NAME}"
+
+# 安装模式: onefile、onedir，未指定时优先使用onedir构建（启动时无需解压）
+INSTALL_MODE="$1"
 
 # 检查是否以root权限运行
 check_root() {
@@ -73,6 +78,66 @@ install_dependencies() {
     echo -e "${GREEN}依赖检查完成${NC}"
 }
 
+# 确定安装模式
+detect_install_mode() {
+    if [ -z "$INSTALL_MODE" ]; then
+        if [ -f "${ONEDIR_PATH}/${EXECUTABLE_NAME}" ]; then
+            INSTALL_MODE="onedir"
+        else
+            INSTALL_MODE="onefile"
+        fi
+    fi
+
+    case "$INSTALL_MODE" in
+        onefile | onedir)
+            echo -e "${BLUE}安装模式: $INSTALL_MODE${NC}"
+            ;;
+        *)
+            echo -e "${RED}错误: 未知的安装模式 $INSTALL_MODE${NC}"
+            echo "用法: $0 [onefile|onedir]"
+            exit 1
+            ;;
+    esac
+}
+
+# 安装onedir构建：程序目录安装到LIB_DIR，在INSTALL_DIR中创建符号链接
+install_onedir() {
+    if [ ! -f "${ONEDIR_PATH}/${EXECUTABLE_NAME}" ]; then
+        echo -e "${RED}错误: 找不到onedir构建 $ONEDIR_PATH${NC}"
+        echo -e "${YELLOW}请先运行 'bash loginCore/build.sh onedir' 进行编译${NC}"
+        exit 1
+    fi
+
+    # 先复制到临时目录再替换，避免升级过程中程序目录不完整
+    rm -rf "${LIB_DIR}.new"
+    mkdir -p "$(dirname "$LIB_DIR")"
+    cp -a "$ONEDIR_PATH" "${LIB_DIR}.new"
+    rm -rf "$LIB_DIR"
+    mv "${LIB_DIR}.new" "$LIB_DIR"
+    chmod 755 "${LIB_DIR}/${EXECUTABLE_NAME}"
+
+    # 预先编译的字节码已打包在程序目录中，运行时不会写入，保持只读
+    chmod -R go-w "$LIB_DIR"
+
+    rm -f "$EXECUTABLE_PATH"
+    ln -s "${LIB_DIR}/${EXECUTABLE_NAME}" "$EXECUTABLE_PATH"
+    echo -e "${GREEN}已安装程序目录: $LIB_DIR${NC}"
+    echo -e "${GREEN}已创建符号链接: $EXECUTABLE_PATH -> ${LIB_DIR}/${EXECUTABLE_NAME}${NC}"
+
+    # 检查系统是否有libsystemd，如果没有则尝试修补依赖libsystemd的扩展模块
+    if ! ldconfig -p 2>/dev/null | grep -q libsystemd; then
+        echo -e "${YELLOW}系统未安装libsystemd，尝试修补程序目录中的扩展模块...${NC}"
+        if [ -f "${SCRIPT_DIR}/patch_binary.sh" ]; then
+            grep -rl --include='*.so*' libsystemd "$LIB_DIR" | while read -r library; do
+                bash "${SCRIPT_DIR}/patch_binary.sh" "$library"
+            done
+        else
+            echo -e "${YELLOW}未找到patch_binary.sh脚本，跳过修补${NC}"
+            echo -e "${YELLOW}注意：如果运行时出现libsystemd相关错误，请安装libsystemd-dev(Debian/Ubuntu)或systemd-devel(RHEL/CentOS)${NC}"
+        fi
+    fi
+}
+
 # 复制程序文件
 copy_program_files() {
     echo -e "${BLUE}安装程序文件...${NC}"
@@ -81,7 +146,13 @@ copy_program_files() {
     mkdir -p "$CONFIG_DIR"
     
     # 检查二进制文件是否存在
-    if [ -f "$BINARY_PATH" ]; then
+    if [ "$INSTALL_MODE" = "onedir" ]; then
+        install_onedir
+    elif [ -f "$BINARY_PATH" ]; then
+        # 从onedir切换为onefile时移除旧的符号链接和程序目录
+        rm -f "$EXECUTABLE_PATH"
+        rm -rf "$LIB_DIR"
+
         # 复制二进制文件
         cp "$BINARY_PATH" "$EXECUTABLE_PATH"
         chmod 755 "$EXECUTABLE_PATH"
@@ -261,6 +332,7 @@ main() {
     echo -e "${GREEN}=== AutoNet4AHU 安装程序 ===${NC}\n"
     
     check_root
+    detect_install_mode
     detect_system
     install_dependencies
     copy_program_files
@@ -11,6 +11,7 @@ NC='\033[0m' # No Color
 
 # 配置文件和安装目录
 INSTALL_DIR="/usr/local/bin"
+LIB_DIR="/usr/local/lib/autonet4ahu"
 CONFIG_DIR="/etc/autonet4ahu"
 CONFIG_FILE="${CONFIG_DIR}/config.json"
 SYSTEMD_SERVICE_DIR="/etc/systemd/system"
@@ -73,14 +74,20 @@ remove_program_files() {
     # 询问是否保留配置文件
     read -p "是否保留配置文件? (y/n): " keep_config
     
-    # 删除可执行文件
-    if [ -f "$EXECUTABLE_PATH" ]; then
+    # 删除可执行文件（onedir安装时为指向程序目录的符号链接）
+    if [ -f "$EXECUTABLE_PATH" ] || [ -L "$EXECUTABLE_PATH" ]; then
         rm -f "$EXECUTABLE_PATH"
         echo -e "${GREEN}可执行文件已删除${NC}"
     else
         echo -e "${YELLOW}可执行文件不存在，跳过${NC}"
     fi
     
+    # 删除onedir安装的程序目录
+    if [ -d "$LIB_DIR" ]; then
+        rm -rf "$LIB_DIR"
+        echo -e "${GREEN}程序目录已删除: $LIB_DIR${NC}"
+    fi
+    
     # 根据用户选择删除配置目录
     if [[ "$keep_config" =~ ^[Yy]$ ]]; then
         echo -e "${BLUE}保留配置文件: $CONFIG_FILE${NC}"